@@ -2,6 +2,7 @@ import argparse
 import os
 from src.algorithms.huffman import HuffmanCompressor
 from src.algorithms.arithmetic import ArithmeticCompressor
+from src.algorithms.lzw import LZWCompressor
 from src.analysis.compression_analyzer import CompressionAnalyzer
 from src.analysis.file_type_detector import FileTypeDetector
 from src.storage.cloud_simulator import CloudSimulator
@@ -10,8 +11,11 @@ from src.storage.cloud_simulator import CloudSimulator
 ALGORITHMS = {
     "huffman": HuffmanCompressor,
     "arithmetic": ArithmeticCompressor,
+    "lzw": LZWCompressor,
 }
 
+_ALG_NAMES = tuple(ALGORITHMS)
+
 
 def cmd_compress(args):
     compressor = ALGORITHMS[args.algorithm]()
@@ -60,13 +64,13 @@ def build_parser():
     sub = p.add_subparsers(dest="cmd", required=True)
 
     c = sub.add_parser("compress")
-    c.add_argument("algorithm", choices=list(ALGORITHMS.keys()))
+    c.add_argument("algorithm", choices=_ALG_NAMES)
     c.add_argument("input")
     c.add_argument("output")
     c.set_defaults(func=cmd_compress)
 
     d = sub.add_parser("decompress")
-    d.add_argument("algorithm", choices=list(ALGORITHMS.keys()))
+    d.add_argument("algorithm", choices=_ALG_NAMES)
     d.add_argument("input")
     d.add_argument("output")
     d.set_defaults(func=cmd_decompress)
@@ -84,7 +88,7 @@ def build_parser():
     cl.add_argument("path", nargs="?", help="File path (local file for upload, output path for download)")
     cl.add_argument("object", nargs="?", help="Cloud object name (for download)")
     cl.add_argument("--compress", action="store_true", help="Compress file before upload")
-    cl.add_argument("--algorithm", choices=list(ALGORITHMS.keys()), help="Compression algorithm")
+    cl.add_argument("--algorithm", choices=_ALG_NAMES, help="Compression algorithm")
     cl.set_defaults(func=cmd_cloud)
 
     return p
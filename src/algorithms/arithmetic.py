@@ -1,14 +1,227 @@
 """
 Arithmetic coding implementation for advanced compression.
 """
-import math
 from typing import Dict, Tuple, Any
+import numpy as np
+try:
+    from numba import njit  # optional: JIT-compiles the coder hot loops
+except Exception:
+    njit = None
 from .base_compressor import BaseCompressor
 
 
+def _ac_encode(data, sym_lo, sym_fq, total_freq, freq_bits, precision, out_buf,
+               low, high, pending, acc, nbits, final):
+    """
+    Range-coder encode loop over one block of a uint8 array.
+
+    Coder state (low/high/pending plus the partial output byte) is passed
+    in and returned so the caller can feed the input in cache-sized blocks;
+    pass final=True on the last call to terminate and pad the stream.
+
+    Args:
+        data: np.uint8 array of input symbols for this block
+        sym_lo: np.int64 array (256) of cumulative frequencies per byte
+        sym_fq: np.int64 array (256) of frequencies per byte
+        total_freq: total frequency count
+        freq_bits: log2(total_freq) when the total is a power of two
+            (divisions become shifts), or -1 to divide
+        precision: coder precision in bits
+        out_buf: preallocated np.uint8 output buffer for this block
+        low, high, pending, acc, nbits: coder state from the previous block
+        final: whether to emit the terminating bit and pad to a byte
+
+    Returns:
+        Tuple of (bytes written to out_buf, low, high, pending, acc, nbits)
+    """
+    half = 1 << (precision - 1)
+    quarter = 1 << (precision - 2)
+    three_quarter = 3 * quarter
+
+    pos = 0
+
+    for i in range(data.shape[0]):
+        byte = data[i]
+        sl = int(sym_lo[byte])
+        sf = int(sym_fq[byte])
+        range_size = high - low + 1
+        if freq_bits >= 0:
+            char_low = low + ((range_size * sl) >> freq_bits)
+            char_high = low + ((range_size * (sl + sf)) >> freq_bits) - 1
+        else:
+            char_low = low + (range_size * sl) // total_freq
+            char_high = low + (range_size * (sl + sf)) // total_freq - 1
+
+        low = char_low
+        high = char_high
+
+        while True:
+            if high < half:
+                bit = 0
+            elif low >= half:
+                bit = 1
+                low -= half
+                high -= half
+            elif low >= quarter and high < three_quarter:
+                pending += 1
+                low = 2 * (low - quarter)
+                high = 2 * (high - quarter) + 1
+                continue
+            else:
+                break
+
+            low = 2 * low
+            high = 2 * high + 1
+
+            acc = (acc << 1) | bit
+            nbits += 1
+            if nbits == 8:
+                out_buf[pos] = acc
+                pos += 1
+                acc = 0
+                nbits = 0
+            while pending > 0:
+                acc = (acc << 1) | (1 - bit)
+                nbits += 1
+                if nbits == 8:
+                    out_buf[pos] = acc
+                    pos += 1
+                    acc = 0
+                    nbits = 0
+                pending -= 1
+
+    if final:
+        # Final bit plus any pending bits
+        acc = (acc << 1) | 1
+        nbits += 1
+        if nbits == 8:
+            out_buf[pos] = acc
+            pos += 1
+            acc = 0
+            nbits = 0
+        while pending > 0:
+            acc = acc << 1
+            nbits += 1
+            if nbits == 8:
+                out_buf[pos] = acc
+                pos += 1
+                acc = 0
+                nbits = 0
+            pending -= 1
+
+        # Zero-pad the last partial byte
+        if nbits > 0:
+            out_buf[pos] = acc << (8 - nbits)
+            pos += 1
+            acc = 0
+            nbits = 0
+
+    return pos, low, high, pending, acc, nbits
+
+
+def _ac_decode(comp, sym_lo, sym_fq, total_freq, freq_bits, total_symbols, precision, out):
+    """
+    Range-coder decode loop reading bits straight from a uint8 array.
+
+    Args:
+        comp: np.uint8 array of compressed bytes
+        sym_lo: np.int64 array (256) of cumulative frequencies per byte
+        sym_fq: np.int64 array (256) of frequencies per byte
+        total_freq: total frequency count
+        freq_bits: log2(total_freq) when the total is a power of two
+            (divisions become shifts), or -1 to divide
+        total_symbols: number of symbols to decode
+        precision: coder precision in bits
+        out: preallocated np.uint8 output buffer
+
+    Returns:
+        Number of symbols decoded
+    """
+    max_value = (1 << precision) - 1
+    half = 1 << (precision - 1)
+    quarter = 1 << (precision - 2)
+    three_quarter = 3 * quarter
+    nbits_avail = comp.shape[0] * 8
+
+    # Cumulative frequency boundaries (257 entries) for binary symbol search;
+    # zero-frequency symbols collapse to empty intervals and are never selected
+    cum = np.empty(257, dtype=np.int64)
+    cum[0] = 0
+    for c in range(256):
+        cum[c + 1] = cum[c] + sym_fq[c]
+
+    value = 0
+    for i in range(min(precision, nbits_avail)):
+        value = (value << 1) | int((comp[i >> 3] >> (7 - (i & 7))) & 1)
+    bit_index = precision
+
+    low = 0
+    high = max_value
+
+    for n in range(total_symbols):
+        range_size = high - low + 1
+        target = ((value - low + 1) * total_freq - 1) // range_size
+
+        # Binary search the cumulative boundaries for the target symbol
+        symbol = int(np.searchsorted(cum, target, side='right')) - 1
+
+        if symbol < 0 or symbol > 255 or sym_fq[symbol] == 0:
+            return n
+
+        out[n] = symbol
+        sl = int(sym_lo[symbol])
+        sf = int(sym_fq[symbol])
+
+        if freq_bits >= 0:
+            char_low = low + ((range_size * sl) >> freq_bits)
+            char_high = low + ((range_size * (sl + sf)) >> freq_bits) - 1
+        else:
+            char_low = low + (range_size * sl) // total_freq
+            char_high = low + (range_size * (sl + sf)) // total_freq - 1
+
+        low = char_low
+        high = char_high
+
+        while True:
+            if high < half:
+                pass
+            elif low >= half:
+                low -= half
+                high -= half
+                value -= half
+            elif low >= quarter and high < three_quarter:
+                low -= quarter
+                high -= quarter
+                value -= quarter
+            else:
+                break
+
+            low = 2 * low
+            high = 2 * high + 1
+            next_bit = 0
+            if bit_index < nbits_avail:
+                next_bit = int((comp[bit_index >> 3] >> (7 - (bit_index & 7))) & 1)
+            value = 2 * value + next_bit
+            bit_index += 1
+
+    return total_symbols
+
+
+if njit is not None:
+    _ac_encode = njit(cache=True)(_ac_encode)
+    _ac_decode = njit(cache=True)(_ac_decode)
+
+
 class ArithmeticCompressor(BaseCompressor):
     """Arithmetic coding compressor implementation."""
     
+    # Encode block size: keeps the working set (input slice + 1KB of
+    # frequency tables) within L1/L2 while amortizing per-call overhead
+    BLOCK_SIZE = 64 * 1024
+
+    # Inputs whose byte entropy exceeds this (bits/byte) are stored raw
+    STORED_ENTROPY_THRESHOLD = 7.5
+
     def __init__(self, precision: int = 32):
         super().__init__("Arithmetic")
         self.precision = precision
@@ -18,27 +231,53 @@ class ArithmeticCompressor(BaseCompressor):
     
     def _build_frequency_table(self, data: bytes) -> Dict[int, int]:
         """Build frequency table for characters in data."""
-        freq_table = {}
-        for byte in data:
-            freq_table[byte] = freq_table.get(byte, 0) + 1
-        return freq_table
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        return {int(char): int(count) for char, count in enumerate(counts) if count}
+    
+    def _build_cumulative_freq(self, freq_table: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Build dense 256-entry (cumulative, frequency) arrays indexed by byte value.
+
+        Byte alphabets are already in natural key order, so one np.cumsum
+        prefix pass replaces the sort-keys-and-loop dict build.
+        """
+        count = len(freq_table)
+        sym_fq = np.zeros(256, dtype=np.int64)
+        chars = np.fromiter(freq_table.keys(), dtype=np.int64, count=count)
+        sym_fq[chars] = np.fromiter(freq_table.values(), dtype=np.int64, count=count)
+        sym_lo = np.empty(256, dtype=np.int64)
+        sym_lo[0] = 0
+        sym_lo[1:] = np.cumsum(sym_fq)[:-1]
+        return sym_lo, sym_fq, int(sym_fq.sum())
     
-    def _build_cumulative_freq(self, freq_table: Dict[int, int]) -> Tuple[Dict[int, int], int]:
-        """Build cumulative frequency table."""
-        sorted_chars = sorted(freq_table.keys())
-        cumulative = {}
-        total = 0
+    def _rescale_to_power_of_two(self, freq_table: Dict[int, int], p: int = 14) -> Dict[int, int]:
+        """
+        Rescale frequencies so they sum to exactly 2**p.
+
+        Every present symbol keeps a count of at least 1; rounding drift is
+        settled by bumping the largest counts up or down. A power-of-two
+        total lets the coder loops replace division with a shift.
+        """
+        target = 1 << p
+        total = sum(freq_table.values())
         
-        for char in sorted_chars:
-            cumulative[char] = total
-            total += freq_table[char]
+        scaled = {char: max(1, round(freq * target / total))
+                  for char, freq in freq_table.items()}
         
-        return cumulative, total
-    
-    def _normalize_frequencies(self, freq_table: Dict[int, int], total: int) -> Dict[int, float]:
-        """Normalize frequencies to probabilities."""
-        return {char: freq / total for char, freq in freq_table.items()}
-    
+        diff = target - sum(scaled.values())
+        while diff != 0:
+            for char in sorted(scaled, key=scaled.get, reverse=True):
+                if diff == 0:
+                    break
+                if diff > 0:
+                    scaled[char] += 1
+                    diff -= 1
+                elif scaled[char] > 1:
+                    scaled[char] -= 1
+                    diff += 1
+        
+        return scaled
+
     def compress(self, data: bytes) -> Tuple[bytes, Dict[str, Any]]:
         """
         Compress data using arithmetic coding.
@@ -56,96 +295,54 @@ class ArithmeticCompressor(BaseCompressor):
         freq_table = self._build_frequency_table(data)
         total_symbols = len(data)
         
-        # Normalize frequencies
-        probabilities = self._normalize_frequencies(freq_table, total_symbols)
+        # Already-compressed inputs (entropy near 8 bits/byte) would gain
+        # nothing from the coder; store them as-is and skip the whole pass
+        probs = np.fromiter(freq_table.values(), dtype=np.float64,
+                            count=len(freq_table)) / total_symbols
+        entropy = float(-(probs * np.log2(probs)).sum())
+        if entropy > self.STORED_ENTROPY_THRESHOLD:
+            metadata = {'stored': True, 'freq_table': {}, 'total_symbols': total_symbols}
+            return bytes(data), metadata
         
-        # Build cumulative frequency table
-        cumulative_freq, total_freq = self._build_cumulative_freq(freq_table)
-        
-        # Initialize range
-        low = 0
-        high = self.max_value
-        
-        # Encode data
-        for byte in data:
-            # Calculate new range
-            range_size = high - low + 1
-            char_low = low + (range_size * cumulative_freq[byte]) // total_freq
-            char_high = low + (range_size * (cumulative_freq[byte] + freq_table[byte])) // total_freq - 1
-            
-            low = char_low
-            high = char_high
-            
-            # Normalize range to prevent underflow
-            while True:
-                if high < self.half:
-                    # Range in lower half
-                    self._emit_bit(0)
-                    low = 2 * low
-                    high = 2 * high + 1
-                elif low >= self.half:
-                    # Range in upper half
-                    self._emit_bit(1)
-                    low = 2 * (low - self.half)
-                    high = 2 * (high - self.half) + 1
-                elif low >= self.quarter and high < 3 * self.quarter:
-                    # Range in middle half
-                    self._pending_bits += 1
-                    low = 2 * (low - self.quarter)
-                    high = 2 * (high - self.quarter) + 1
-                else:
-                    break
-        
-        # Emit final bits
-        self._emit_bit(1)
-        
-        # Convert to bytes
-        compressed_data = self._bits_to_bytes()
+        # Rescale to a power-of-two total so the coder can shift, not divide
+        freq_bits = 14
+        freq_table = self._rescale_to_power_of_two(freq_table, freq_bits)
+
+        # Dense cumulative/frequency arrays for the native encode loop
+        sym_lo, sym_fq, total_freq = self._build_cumulative_freq(freq_table)
+
+        # Encode in 64KB blocks so the input slice and the 256-entry
+        # frequency arrays stay cache-resident; coder state carries across.
+        # One preallocated output buffer covers the whole stream (rescaled
+        # probabilities can cost up to ~1 extra bit per symbol), so blocks
+        # write in place instead of growing a bytearray
+        out_buf = np.empty(len(data) + len(data) // 4 + 128, dtype=np.uint8)
+        offset = 0
+        mv = memoryview(data)
+        low, high, pending, acc, nbits = 0, self.max_value, 0, 0, 0
+        for start in range(0, len(data), self.BLOCK_SIZE):
+            block = np.frombuffer(mv[start:start + self.BLOCK_SIZE], dtype=np.uint8)
+            nbytes, low, high, pending, acc, nbits = _ac_encode(
+                block, sym_lo, sym_fq, total_freq, freq_bits,
+                self.precision, out_buf[offset:], low, high, pending, acc, nbits, False)
+            offset += nbytes
         
+        # Terminate the stream
+        nbytes, low, high, pending, acc, nbits = _ac_encode(
+            np.empty(0, dtype=np.uint8), sym_lo, sym_fq, total_freq, freq_bits,
+            self.precision, out_buf[offset:], low, high, pending, acc, nbits, True)
+        offset += nbytes
+        compressed_data = out_buf[:offset].tobytes()
+
         metadata = {
             'freq_table': freq_table,
             'total_symbols': total_symbols,
-            'cumulative_freq': cumulative_freq,
-            'total_freq': total_freq
+            'total_freq': total_freq,
+            'freq_bits': freq_bits
         }
         
         return compressed_data, metadata
     
-    def _emit_bit(self, bit: int):
-        """Emit a bit to the output stream."""
-        if not hasattr(self, '_bit_buffer'):
-            self._bit_buffer = 0
-            self._bits_in_buffer = 0
-            self._pending_bits = 0
-        
-        self._bit_buffer = (self._bit_buffer << 1) | bit
-        self._bits_in_buffer += 1
-        
-        # Emit pending bits if any
-        while self._pending_bits > 0:
-            self._bit_buffer = (self._bit_buffer << 1) | (1 - bit)
-            self._bits_in_buffer += 1
-            self._pending_bits -= 1
-        
-        # Emit complete bytes
-        if self._bits_in_buffer >= 8:
-            if not hasattr(self, '_output_bytes'):
-                self._output_bytes = bytearray()
-            self._output_bytes.append(self._bit_buffer >> (self._bits_in_buffer - 8))
-            self._bits_in_buffer -= 8
-            self._bit_buffer &= (1 << self._bits_in_buffer) - 1
-    
-    def _bits_to_bytes(self) -> bytes:
-        """Convert bit buffer to bytes."""
-        if not hasattr(self, '_output_bytes'):
-            return b''
-        
-        # Add remaining bits
-        if self._bits_in_buffer > 0:
-            self._output_bytes.append(self._bit_buffer << (8 - self._bits_in_buffer))
-        
-        return bytes(self._output_bytes)
-    
     def decompress(self, compressed_data: bytes, metadata: Dict[str, Any]) -> bytes:
         """
         Decompress data using arithmetic coding.
@@ -160,83 +357,27 @@ class ArithmeticCompressor(BaseCompressor):
         if not compressed_data:
             return b''
         
+        # Stored block: the payload is the original data
+        if metadata.get('stored'):
+            return bytes(compressed_data)
+        
         freq_table = metadata['freq_table']
         total_symbols = metadata['total_symbols']
-        cumulative_freq = metadata['cumulative_freq']
         total_freq = metadata['total_freq']
-        
-        # Convert bytes to bits
-        bits = self._bytes_to_bits(compressed_data)
-        
-        # Initialize decoder
-        value = 0
-        for i in range(min(self.precision, len(bits))):
-            value = (value << 1) | int(bits[i])
-        
-        bit_index = self.precision
-        
-        # Initialize range
-        low = 0
-        high = self.max_value
-        
-        # Decode data
-        result = bytearray()
-        
-        for _ in range(total_symbols):
-            # Calculate range size
-            range_size = high - low + 1
-            
-            # Find symbol
-            target = ((value - low + 1) * total_freq - 1) // range_size
-            
-            # Binary search for symbol
-            symbol = None
-            for char, cum_freq in cumulative_freq.items():
-                if cum_freq <= target < cum_freq + freq_table[char]:
-                    symbol = char
-                    break
-            
-            if symbol is None:
-                break
-            
-            result.append(symbol)
-            
-            # Update range
-            char_low = low + (range_size * cumulative_freq[symbol]) // total_freq
-            char_high = low + (range_size * (cumulative_freq[symbol] + freq_table[symbol])) // total_freq - 1
-            
-            low = char_low
-            high = char_high
-            
-            # Normalize range
-            while True:
-                if high < self.half:
-                    low = 2 * low
-                    high = 2 * high + 1
-                    value = 2 * value + (int(bits[bit_index]) if bit_index < len(bits) else 0)
-                    bit_index += 1
-                elif low >= self.half:
-                    low = 2 * (low - self.half)
-                    high = 2 * (high - self.half) + 1
-                    value = 2 * (value - self.half) + (int(bits[bit_index]) if bit_index < len(bits) else 0)
-                    bit_index += 1
-                elif low >= self.quarter and high < 3 * self.quarter:
-                    low = 2 * (low - self.quarter)
-                    high = 2 * (high - self.quarter) + 1
-                    value = 2 * (value - self.quarter) + (int(bits[bit_index]) if bit_index < len(bits) else 0)
-                    bit_index += 1
-                else:
-                    break
-        
-        return bytes(result)
-    
-    def _bytes_to_bits(self, data: bytes) -> str:
-        """Convert bytes to bit string."""
-        bits = ""
-        for byte in data:
-            bits += format(byte, '08b')
-        return bits
-    
+        # Streams written before frequency rescaling carry no freq_bits and
+        # fall back to division in the decode loop
+        freq_bits = metadata.get('freq_bits', -1)
+
+        # Rebuild the dense arrays from the frequency table; the prefix sum
+        # is deterministic in byte order, matching what the encoder used
+        sym_lo, sym_fq, _ = self._build_cumulative_freq(freq_table)
+
+        comp = np.frombuffer(compressed_data, dtype=np.uint8)
+        out = np.empty(total_symbols, dtype=np.uint8)
+        ndecoded = _ac_decode(comp, sym_lo, sym_fq, total_freq, freq_bits,
+                              total_symbols, self.precision, out)
+        return out[:ndecoded].tobytes()
+
     def get_compression_ratio(self) -> float:
         """Get compression ratio for the last compression."""
         if not self.compression_stats:
@@ -6,11 +6,23 @@ from typing import Tuple, Dict, Any
 import time
 import os
 import json
+import mmap
+import pickle
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 
 class BaseCompressor(ABC):
     """Abstract base class for all compression algorithms."""
     
+    # Metadata tables whose integer keys JSON stringifies on round-trip
+    _KEYS_NEEDING_INT_FIX = ('freq_table', 'cumulative_freq', 'huffman_codes')
+
+    # Codecs must opt in before the streaming paths will call
+    # compress/decompress from several threads at once; adapters wrapping
+    # shared mutable C state stay serial even when workers are requested
+    THREAD_SAFE = False
+    
     def __init__(self, name: str):
         self.name = name
         self.compression_stats = {}
@@ -55,24 +67,30 @@ class BaseCompressor(ABC):
         """
         start_time = time.time()
         
-        # Read input file
+        # Memory-map the input so compression reads straight from the page
+        # cache instead of first copying the whole file into a bytes object
         with open(input_path, 'rb') as f:
-            original_data = f.read()
-        
-        original_size = len(original_data)
+            original_size = os.fstat(f.fileno()).st_size
+            if original_size:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    compressed_data, metadata = self.compress(memoryview(mm))
+                finally:
+                    mm.close()
+            else:
+                compressed_data, metadata = self.compress(b'')
         
-        # Compress data
-        compressed_data, metadata = self.compress(original_data)
         compressed_size = len(compressed_data)
         
         # Save compressed file
         with open(output_path, 'wb') as f:
             f.write(compressed_data)
         
-        # Save metadata to a separate JSON file
-        metadata_path = output_path + '.metadata.json'
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
+        # Save metadata to a separate binary sidecar; pickle keeps the
+        # integer dict keys intact so no key fixup is needed on load
+        metadata_path = output_path + '.metadata.pkl'
+        with open(metadata_path, 'wb') as f:
+            pickle.dump(metadata, f, protocol=5)
         
         # Calculate statistics
         compression_time = time.time() - start_time
@@ -109,13 +127,18 @@ class BaseCompressor(ABC):
         with open(input_path, 'rb') as f:
             compressed_data = f.read()
         
-        # Read metadata from JSON file
-        metadata_path = input_path + '.metadata.json'
+        # Read metadata from the binary sidecar, falling back to the legacy
+        # JSON sidecar for archives written by older versions
+        metadata_path = input_path + '.metadata.pkl'
+        json_metadata_path = input_path + '.metadata.json'
         if os.path.exists(metadata_path):
-            with open(metadata_path, 'r') as f:
+            with open(metadata_path, 'rb') as f:
+                metadata = pickle.load(f)
+        elif os.path.exists(json_metadata_path):
+            with open(json_metadata_path, 'r') as f:
                 metadata = json.load(f)
             # Convert string keys to integers for dictionaries with numeric keys
-            metadata = self._fix_json_keys(metadata)
+            metadata = self._fix_metadata_keys(metadata)
         else:
             # Fallback to in-memory metadata if available
             metadata = self.compression_stats.get('metadata', {})
@@ -140,24 +163,253 @@ class BaseCompressor(ABC):
         
         return stats
     
-    def _fix_json_keys(self, data: Any) -> Any:
-        """Recursively convert string keys to integers in nested structures."""
-        if isinstance(data, dict):
-            # Try to convert keys to int if they are numeric strings
-            fixed_dict = {}
-            for key, value in data.items():
-                fixed_key = key
-                if isinstance(key, str) and key.isdigit():
-                    try:
-                        fixed_key = int(key)
-                    except ValueError:
-                        pass
-                fixed_dict[fixed_key] = self._fix_json_keys(value)
-            return fixed_dict
-        elif isinstance(data, list):
-            return [self._fix_json_keys(item) for item in data]
+    def compress_file_blocked(self, input_path: str, output_path: str,
+                              block_size: int = 1 << 20, workers: int = None) -> Dict[str, Any]:
+        """
+        Compress a file as independently coded blocks, in parallel.
+
+        The input is split into block_size slices that worker processes
+        compress concurrently. The output file is framed as
+        [u32 block_count][u32 len_0 ... u32 len_n-1][payload_0 ... payload_n-1]
+        with the per-block metadata list stored in the usual pickle sidecar.
+
+        Args:
+            input_path: Path to input file
+            output_path: Path to output compressed file
+            block_size: Bytes per independently compressed block
+            workers: Worker process count (default: os.cpu_count())
+
+        Returns:
+            Compression statistics
+        """
+        start_time = time.time()
+        
+        # Slice the input into blocks
+        blocks = []
+        with open(input_path, 'rb') as f:
+            original_size = os.fstat(f.fileno()).st_size
+            if original_size:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    for offset in range(0, original_size, block_size):
+                        blocks.append(bytes(mm[offset:offset + block_size]))
+                finally:
+                    mm.close()
+        
+        # Compress blocks in parallel; each worker gets its own coder state
+        if len(blocks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.compress, blocks))
+        else:
+            results = [self.compress(block) for block in blocks]
+        
+        payloads = [payload for payload, _ in results]
+        block_metadata = [metadata for _, metadata in results]
+        
+        # Write the framed output
+        with open(output_path, 'wb') as f:
+            f.write(struct.pack('<I', len(payloads)))
+            for payload in payloads:
+                f.write(struct.pack('<I', len(payload)))
+            for payload in payloads:
+                f.write(payload)
+        
+        metadata = {
+            'blocked': True,
+            'block_size': block_size,
+            'block_metadata': block_metadata
+        }
+        metadata_path = output_path + '.metadata.pkl'
+        with open(metadata_path, 'wb') as f:
+            pickle.dump(metadata, f, protocol=5)
+        
+        compressed_size = os.path.getsize(output_path)
+        compression_time = time.time() - start_time
+        compression_ratio = compressed_size / original_size if original_size > 0 else 0
+        
+        stats = {
+            'algorithm': self.name,
+            'original_size': original_size,
+            'compressed_size': compressed_size,
+            'compression_ratio': compression_ratio,
+            'space_saved': original_size - compressed_size,
+            'compression_time': compression_time,
+            'blocks': len(payloads),
+            'metadata': metadata
+        }
+        
+        self.compression_stats = stats
+        return stats
+    
+    def compress_to_file(self, input_path: str, output_path: str,
+                         block_size: int = 1 << 20,
+                         workers: int = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Stream-compress a file into the blocked frame without loading it.
+
+        Reads block_size slices one at a time and writes each compressed
+        payload as soon as it is produced, so peak memory stays O(block)
+        regardless of file size. The frame matches compress_file_blocked;
+        the metadata is returned to the caller instead of written to a
+        sidecar.
+
+        Args:
+            input_path: Path to input file
+            output_path: Path to output compressed file
+            block_size: Bytes per independently compressed block
+            workers: Thread count for per-block compression (default:
+                serial; honored only when the codec declares THREAD_SAFE,
+                and worthwhile only for codecs that release the GIL)
+
+        Returns:
+            Tuple of (compressed_size, metadata)
+        """
+        block_metadata = []
+        lengths = []
+        with open(input_path, 'rb') as src, open(output_path, 'wb') as dst:
+            size = os.fstat(src.fileno()).st_size
+            block_count = (size + block_size - 1) // block_size
+            # Reserve the frame header in one write; the length table is
+            # patched in once every payload has been written
+            dst.write(struct.pack('<I', block_count) + b'\x00' * (4 * block_count))
+            if size:
+                # Map the input and hand the encoder zero-copy block
+                # views; MADV_SEQUENTIAL lets the kernel drop pages
+                # behind the read cursor
+                mm = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                except (AttributeError, OSError):
+                    pass
+                view = memoryview(mm)
+                blocks = [view[offset:offset + block_size]
+                          for offset in range(0, size, block_size)]
+                try:
+                    if workers is not None and workers > 1 and block_count > 1 and self.THREAD_SAFE:
+                        # C-backed codecs release the GIL, so threads
+                        # overlap the per-block encodes; results come
+                        # back in order and are written as they land
+                        with ThreadPoolExecutor(max_workers=workers) as executor:
+                            for payload, meta in executor.map(self.compress, blocks):
+                                dst.write(payload)
+                                lengths.append(len(payload))
+                                block_metadata.append(meta)
+                    else:
+                        for block in blocks:
+                            payload, meta = self.compress(block)
+                            dst.write(payload)
+                            lengths.append(len(payload))
+                            block_metadata.append(meta)
+                finally:
+                    # Release every exported view before closing the map;
+                    # pool internals can keep block references alive past
+                    # the loop and mmap refuses to close under them
+                    for block in blocks:
+                        block.release()
+                    view.release()
+                    mm.close()
+            dst.seek(4)
+            dst.write(struct.pack('<%dI' % block_count, *lengths))
+
+        metadata = {
+            'blocked': True,
+            'block_size': block_size,
+            'block_metadata': block_metadata
+        }
+        return 4 + 4 * block_count + sum(lengths), metadata
+
+    def decompress_from_file(self, input_path: str, output_path: str,
+                             metadata: Dict[str, Any], workers: int = None) -> int:
+        """
+        Stream-decompress a blocked frame using caller-supplied metadata.
+
+        Counterpart of compress_to_file for callers that keep the
+        metadata themselves (e.g. the cloud bucket) rather than in the
+        pickle sidecar. Blocks are decoded and written one at a time.
+
+        Args:
+            input_path: Path to blocked compressed file
+            output_path: Path to output decompressed file
+            metadata: Metadata returned by compress_to_file
+            workers: Thread count for per-block decompression (default:
+                serial; honored only when the codec declares THREAD_SAFE,
+                trading O(compressed) memory for parallel decode)
+
+        Returns:
+            Number of decompressed bytes written
+        """
+        block_metadata = metadata['block_metadata']
+        total = 0
+        with open(input_path, 'rb') as src, open(output_path, 'wb') as dst:
+            (block_count,) = struct.unpack('<I', src.read(4))
+            lengths = struct.unpack('<%dI' % block_count, src.read(4 * block_count))
+            if workers is not None and workers > 1 and block_count > 1 and self.THREAD_SAFE:
+                payloads = [src.read(length) for length in lengths]
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for output in executor.map(self.decompress, payloads, block_metadata):
+                        dst.write(output)
+                        total += len(output)
+            else:
+                for length, meta in zip(lengths, block_metadata):
+                    output = self.decompress(src.read(length), meta)
+                    dst.write(output)
+                    total += len(output)
+        return total
+
+    def decompress_file_blocked(self, input_path: str, output_path: str,
+                                workers: int = None) -> Dict[str, Any]:
+        """
+        Decompress a file written by compress_file_blocked.
+
+        Args:
+            input_path: Path to blocked compressed file
+            output_path: Path to output decompressed file
+            workers: Worker process count (default: os.cpu_count())
+
+        Returns:
+            Decompression statistics
+        """
+        start_time = time.time()
+        
+        metadata_path = input_path + '.metadata.pkl'
+        with open(metadata_path, 'rb') as f:
+            metadata = pickle.load(f)
+        block_metadata = metadata['block_metadata']
+        
+        # Read the frame and slice out the block payloads
+        with open(input_path, 'rb') as f:
+            (block_count,) = struct.unpack('<I', f.read(4))
+            lengths = struct.unpack('<%dI' % block_count, f.read(4 * block_count))
+            payloads = [f.read(length) for length in lengths]
+        
+        # Decompress blocks in parallel
+        if block_count > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outputs = list(executor.map(self.decompress, payloads, block_metadata))
         else:
-            return data
+            outputs = [self.decompress(payload, meta)
+                       for payload, meta in zip(payloads, block_metadata)]
+        
+        with open(output_path, 'wb') as f:
+            for output in outputs:
+                f.write(output)
+        
+        decompressed_size = sum(len(output) for output in outputs)
+        
+        return {
+            'algorithm': self.name,
+            'decompression_time': time.time() - start_time,
+            'decompressed_size': decompressed_size,
+            'blocks': block_count
+        }
+    
+    def _fix_metadata_keys(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert string keys back to integers in the known numeric-keyed tables."""
+        for key in self._KEYS_NEEDING_INT_FIX:
+            table = metadata.get(key)
+            if isinstance(table, dict):
+                metadata[key] = {int(k): v for k, v in table.items()}
+        return metadata
     
     def get_compression_stats(self) -> Dict[str, Any]:
         """Get the latest compression statistics."""
@@ -0,0 +1,122 @@
+"""
+Adapters exposing fast general-purpose codecs (LZ4, Zstandard) behind the
+common compressor interface. Both libraries are optional; the adapters
+register only when their backing module imports.
+"""
+import threading
+from typing import Dict, Any, Tuple
+from .base_compressor import BaseCompressor
+
+try:
+    import lz4.frame as lz4_frame  # optional: C-level LZ frame codec
+except Exception:
+    lz4_frame = None
+try:
+    import zstandard  # optional: C-level Zstandard bindings
+except Exception:
+    zstandard = None
+
+HAS_LZ4 = lz4_frame is not None
+HAS_ZSTD = zstandard is not None
+
+
+class LZ4Compressor(BaseCompressor):
+    """LZ4 frame codec behind the BaseCompressor interface."""
+
+    # lz4.frame.compress/decompress are stateless module-level calls
+    THREAD_SAFE = True
+
+    def __init__(self, compression_level: int = 1):
+        if lz4_frame is None:
+            raise ImportError("LZ4Compressor requires the 'lz4' package")
+        super().__init__("LZ4")
+        self.compression_level = compression_level
+
+    def compress(self, data: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Compress data with the LZ4 frame format.
+
+        Args:
+            data: Input bytes to compress
+
+        Returns:
+            Tuple of (compressed_data, metadata)
+        """
+        data = bytes(data)
+        compressed = lz4_frame.compress(data,
+                                        compression_level=self.compression_level,
+                                        block_size=lz4_frame.BLOCKSIZE_MAX4MB)
+        return compressed, {'original_length': len(data)}
+
+    def decompress(self, compressed_data: bytes, metadata: Dict[str, Any]) -> bytes:
+        """
+        Decompress an LZ4 frame.
+
+        Args:
+            compressed_data: Compressed bytes
+            metadata: Compression metadata
+
+        Returns:
+            Original uncompressed data
+        """
+        if not compressed_data:
+            return b''
+        return lz4_frame.decompress(compressed_data)
+
+
+class ZstdCompressor(BaseCompressor):
+    """Zstandard codec behind the BaseCompressor interface."""
+
+    # The contexts below are per-thread, so concurrent calls never share one
+    THREAD_SAFE = True
+
+    def __init__(self, level: int = 3):
+        if zstandard is None:
+            raise ImportError("ZstdCompressor requires the 'zstandard' package")
+        super().__init__("Zstd")
+        self.level = level
+        # zstandard context objects are not safe for concurrent use, so
+        # each calling thread lazily gets its own pair. Block-level
+        # threading supplies the parallelism, hence no threads=-1 inside
+        # the contexts themselves.
+        self._local = threading.local()
+
+    def _contexts(self):
+        """This thread's (compressor, decompressor) pair, built on first use."""
+        try:
+            return self._local.compressor, self._local.decompressor
+        except AttributeError:
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+            return self._local.compressor, self._local.decompressor
+
+    def compress(self, data: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Compress data with Zstandard.
+
+        Args:
+            data: Input bytes to compress
+
+        Returns:
+            Tuple of (compressed_data, metadata)
+        """
+        data = bytes(data)
+        compressor, _ = self._contexts()
+        return compressor.compress(data), {'original_length': len(data)}
+
+    def decompress(self, compressed_data: bytes, metadata: Dict[str, Any]) -> bytes:
+        """
+        Decompress a Zstandard frame.
+
+        Args:
+            compressed_data: Compressed bytes
+            metadata: Compression metadata
+
+        Returns:
+            Original uncompressed data
+        """
+        if not compressed_data:
+            return b''
+        _, decompressor = self._contexts()
+        return decompressor.decompress(
+            compressed_data, max_output_size=metadata.get('original_length', 0))
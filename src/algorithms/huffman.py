@@ -4,8 +4,69 @@ Huffman coding implementation for lossless data compression.
 import heapq
 from collections import Counter, defaultdict
 from typing import Dict, Tuple, Any
+import numpy as np
+try:
+    from numba import njit  # optional: JIT-compiles the decode hot loop
+except Exception:
+    njit = None
 from .base_compressor import BaseCompressor
 
+_MASK64 = (1 << 64) - 1
+
+
+def _huffman_decode(bits, tbl_sym, tbl_len, long_cv, long_cl, long_sym, table_bits, total_bits, out):
+    """
+    Table-driven Huffman decode over an array of 0/1 bits.
+
+    Codes of length <= table_bits resolve in a single lookup; rarer longer
+    codes fall through to a linear probe of the long-code arrays.
+
+    Returns:
+        Number of symbols written to out
+    """
+    pos = 0
+    opos = 0
+    n_long = long_cv.shape[0]
+
+    while pos < total_bits:
+        # Gather the next table_bits bits into an index (zero-padded at end)
+        idx = 0
+        for i in range(pos, pos + table_bits):
+            if i < total_bits:
+                idx = (idx << 1) | int(bits[i])
+            else:
+                idx = idx << 1
+        code_len = int(tbl_len[idx])
+
+        if code_len > 0:
+            out[opos] = tbl_sym[idx]
+            opos += 1
+            pos += code_len
+        else:
+            # Long code: keep extending the window until a code matches
+            code_val = idx
+            code_len = table_bits
+            matched = False
+            while not matched and pos + code_len < total_bits:
+                next_bit = int(bits[pos + code_len])
+                code_val = (code_val << 1) | next_bit
+                code_len += 1
+                for j in range(n_long):
+                    if long_cl[j] == code_len and long_cv[j] == code_val:
+                        out[opos] = long_sym[j]
+                        opos += 1
+                        pos += code_len
+                        matched = True
+                        break
+            if not matched:
+                break
+
+    return opos
+
+
+if njit is not None:
+    _huffman_decode = njit(cache=True)(_huffman_decode)
+
 
 class HuffmanNode:
     """Node class for Huffman tree."""
@@ -27,10 +88,15 @@ class HuffmanCompressor(BaseCompressor):
         super().__init__("Huffman")
         self.huffman_codes = {}
         self.reverse_codes = {}
+        # (code book, decode tables) from the previous decompress call;
+        # streaming workloads reuse the same metadata dict across calls
+        self._decode_tables_cache = (None, None)
     
     def _build_frequency_table(self, data: bytes) -> Counter:
         """Build frequency table for characters in data."""
-        return Counter(data)
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        chars = np.nonzero(counts)[0]
+        return Counter(dict(zip(chars.tolist(), counts[chars].tolist())))
     
     def _build_huffman_tree(self, freq_table: Counter) -> HuffmanNode:
         """Build Huffman tree from frequency table."""
@@ -56,50 +122,68 @@ class HuffmanCompressor(BaseCompressor):
         
         return heap[0]
     
-    def _generate_codes(self, root: HuffmanNode, code: str = "") -> Dict[int, str]:
-        """Generate Huffman codes by traversing the tree."""
+    def _generate_codes(self, root: HuffmanNode) -> Dict[int, Tuple[int, int]]:
+        """
+        Generate Huffman codes as (value, length) pairs with an explicit stack.
+
+        An iterative traversal avoids recursion frames and the per-level
+        string concatenation of the recursive version; codes stay packed as
+        ints until a string form is actually needed.
+        """
+        if root.char is not None:
+            # Single-symbol tree
+            return {root.char: (0, 1)}
+        
         codes = {}
+        stack = [(root, 0, 0)]
         
-        if root.char is not None:
-            # Leaf node
-            codes[root.char] = code if code else "0"
-        else:
-            # Internal node
-            if root.left:
-                codes.update(self._generate_codes(root.left, code + "0"))
-            if root.right:
-                codes.update(self._generate_codes(root.right, code + "1"))
+        while stack:
+            node, value, length = stack.pop()
+            if node.char is not None:
+                codes[node.char] = (value, length)
+            else:
+                if node.right:
+                    stack.append((node.right, (value << 1) | 1, length + 1))
+                if node.left:
+                    stack.append((node.left, value << 1, length + 1))
         
         return codes
     
-    def _encode_data(self, data: bytes, codes: Dict[int, str]) -> str:
-        """Encode data using Huffman codes."""
-        encoded_bits = ""
+    def _pack_codes(self, data: bytes, pairs: Dict[int, Tuple[int, int]]) -> Tuple[bytes, int]:
+        """
+        Encode data and pack the code bits into bytes in one pass.
+
+        Codes are given as (value, length) pairs and shifted into a rolling
+        integer accumulator, flushed 64 bits (8 bytes) at a time.
+
+        Returns:
+            Tuple of (packed_bytes, total_bit_length)
+        """
+        out = bytearray()
+        acc = 0
+        nbits = 0
+        total_bits = 0
+
         for byte in data:
-            encoded_bits += codes[byte]
-        return encoded_bits
-    
-    def _bits_to_bytes(self, bits: str) -> bytes:
-        """Convert bit string to bytes."""
-        # Pad with zeros to make length multiple of 8
-        padding = (8 - len(bits) % 8) % 8
-        bits += "0" * padding
-        
-        # Convert to bytes
-        result = bytearray()
-        for i in range(0, len(bits), 8):
-            byte_bits = bits[i:i+8]
-            result.append(int(byte_bits, 2))
-        
-        return bytes(result)
+            value, length = pairs[byte]
+            acc = (acc << length) | value
+            nbits += length
+            total_bits += length
+            while nbits >= 64:
+                nbits -= 64
+                out += ((acc >> nbits) & _MASK64).to_bytes(8, 'big')
+                acc &= (1 << nbits) - 1
+
+        # Flush the tail, zero-padded to a byte boundary
+        if nbits:
+            pad = (8 - nbits % 8) % 8
+            out += (acc << pad).to_bytes((nbits + pad) // 8, 'big')
+
+        return bytes(out), total_bits
     
-    def _bytes_to_bits(self, data: bytes, original_length: int) -> str:
-        """Convert bytes back to bit string."""
-        bits = ""
-        for byte in data:
-            bits += format(byte, '08b')
-        
-        # Remove padding
+    def _bytes_to_bits(self, data: bytes, original_length: int) -> np.ndarray:
+        """Convert bytes back to an array of 0/1 bits, padding removed."""
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
         return bits[:original_length]
     
     def compress(self, data: bytes) -> Tuple[bytes, Dict[str, Any]]:
@@ -121,23 +205,23 @@ class HuffmanCompressor(BaseCompressor):
         # Build Huffman tree
         root = self._build_huffman_tree(freq_table)
         
-        # Generate codes
-        codes = self._generate_codes(root)
+        # Generate codes as (value, length) pairs; keep the string form for
+        # metadata and the reverse map
+        code_pairs = self._generate_codes(root)
+        codes = {char: format(value, '0%db' % length)
+                 for char, (value, length) in code_pairs.items()}
         self.huffman_codes = codes
         self.reverse_codes = {v: k for k, v in codes.items()}
         
-        # Encode data
-        encoded_bits = self._encode_data(data, codes)
-        
-        # Convert to bytes
-        compressed_data = self._bits_to_bytes(encoded_bits)
+        # Encode and pack data in one pass
+        compressed_data, total_bits = self._pack_codes(data, code_pairs)
         
         # Calculate padding
-        padding = (8 - len(encoded_bits) % 8) % 8
+        padding = (8 - total_bits % 8) % 8
         
         metadata = {
             'huffman_codes': codes,
-            'original_length': len(encoded_bits),
+            'original_length': total_bits,
             'padding': padding
         }
         
@@ -160,23 +244,56 @@ class HuffmanCompressor(BaseCompressor):
         codes = metadata['huffman_codes']
         original_length = metadata['original_length']
         
-        # Rebuild reverse codes
-        reverse_codes = {v: k for k, v in codes.items()}
+        # Build the decode lookup tables, reusing the cached ones when the
+        # same code book object is passed again
+        cached_codes, cached_tables = self._decode_tables_cache
+        if cached_codes is codes:
+            tables = cached_tables
+        else:
+            tables = self._build_decode_tables(codes)
+            self._decode_tables_cache = (codes, tables)
+        tbl_sym, tbl_len, long_cv, long_cl, long_sym, table_bits = tables
         
         # Convert bytes back to bits
         bits = self._bytes_to_bits(compressed_data, original_length)
         
         # Decode data
-        decoded_data = bytearray()
-        current_code = ""
+        out = np.empty(original_length, dtype=np.uint8)
+        ndecoded = _huffman_decode(bits, tbl_sym, tbl_len, long_cv, long_cl,
+                                   long_sym, table_bits, original_length, out)
+        return out[:ndecoded].tobytes()
+    
+    def _build_decode_tables(self, codes: Dict[int, str]):
+        """
+        Build a multi-bit lookup table from the code book.
+
+        Each code of length <= table_bits fills all table slots sharing its
+        prefix with (symbol, length); longer codes go into parallel arrays
+        probed on table miss.
+        """
+        max_len = max(len(code) for code in codes.values())
+        table_bits = min(max_len, 12)
+        
+        tbl_sym = np.full(1 << table_bits, -1, dtype=np.int32)
+        tbl_len = np.zeros(1 << table_bits, dtype=np.uint8)
+        long_codes = []
+        
+        for char, code in codes.items():
+            code_len = len(code)
+            code_val = int(code, 2)
+            if code_len <= table_bits:
+                base = code_val << (table_bits - code_len)
+                for suffix in range(1 << (table_bits - code_len)):
+                    tbl_sym[base + suffix] = char
+                    tbl_len[base + suffix] = code_len
+            else:
+                long_codes.append((code_val, code_len, char))
         
-        for bit in bits:
-            current_code += bit
-            if current_code in reverse_codes:
-                decoded_data.append(reverse_codes[current_code])
-                current_code = ""
+        long_cv = np.array([c[0] for c in long_codes], dtype=np.int64)
+        long_cl = np.array([c[1] for c in long_codes], dtype=np.int64)
+        long_sym = np.array([c[2] for c in long_codes], dtype=np.int32)
         
-        return bytes(decoded_data)
+        return tbl_sym, tbl_len, long_cv, long_cl, long_sym, table_bits
     
     def get_compression_ratio(self) -> float:
         """Get compression ratio for the last compression."""
@@ -0,0 +1,290 @@
+"""
+LZW (Lempel-Ziv-Welch) dictionary compression implementation.
+"""
+from typing import Dict, Tuple, Any, List
+from array import array
+import numpy as np
+from .base_compressor import BaseCompressor
+
+
+class LZWCompressor(BaseCompressor):
+    """LZW compression algorithm implementation."""
+
+    # Interned 1-byte objects, indexed by byte value, so hot paths never
+    # allocate a fresh bytes([i]) per byte
+    _SINGLE_BYTES = tuple(bytes([i]) for i in range(256))
+
+    # Codes 0-255 never change, so the base reverse dictionary is built
+    # once and dict.copy()'d per decompress instead of re-inserted
+    _BASE_REVERSE_DICT = dict(enumerate(_SINGLE_BYTES))
+
+    def __init__(self, max_code_bits: int = 12):
+        super().__init__("LZW")
+        self.code_bits = max_code_bits
+        self.max_dict_size = 1 << max_code_bits
+
+    def _initialize_reverse_dictionary(self) -> Dict[int, bytes]:
+        """Return a fresh copy of the base reverse dictionary (codes 0-255)."""
+        return self._BASE_REVERSE_DICT.copy()
+
+    def _codes_to_bytes(self, codes: List[int]) -> bytes:
+        """Pack a list of codes into bytes, code_bits bits per code."""
+        if self.code_bits == 12:
+            # Two 12-bit codes fill exactly 3 bytes, so the whole stream
+            # packs with three vectorized shift/mask passes instead of a
+            # per-code bit-buffer loop. An array('H') buffer is viewed
+            # zero-copy; only plain lists need conversion
+            if isinstance(codes, array):
+                a = np.frombuffer(codes, dtype=np.uint16)
+            else:
+                a = np.asarray(codes, dtype=np.uint16)
+            pairs = a[:len(a) & ~1].reshape(-1, 2).astype(np.uint32)
+            packed = np.empty((pairs.shape[0], 3), dtype=np.uint8)
+            packed[:, 0] = pairs[:, 0] >> 4
+            packed[:, 1] = ((pairs[:, 0] & 0xF) << 4) | (pairs[:, 1] >> 8)
+            packed[:, 2] = pairs[:, 1] & 0xFF
+            result = bytearray(packed.tobytes())
+            if len(a) & 1:
+                tail = int(a[-1])
+                result.append(tail >> 4)
+                result.append((tail & 0xF) << 4)
+            return bytes(result)
+
+        if self.code_bits % 4 == 0:
+            # Nibble-aligned widths: a pair of codes spans a whole number of
+            # bytes, so pack pairwise with no bit-buffer state
+            bits = self.code_bits
+            pair_bytes = bits // 4
+            result = bytearray()
+            for i in range(0, len(codes) - 1, 2):
+                word = (codes[i] << bits) | codes[i + 1]
+                result += word.to_bytes(pair_bytes, 'big')
+            if len(codes) & 1:
+                tail_bytes = (bits + 7) // 8
+                pad = tail_bytes * 8 - bits
+                result += (codes[-1] << pad).to_bytes(tail_bytes, 'big')
+            return bytes(result)
+
+        # Generic bit-buffer path for the remaining code widths
+        result = bytearray()
+        bit_buffer = 0
+        bits_in_buffer = 0
+
+        for code in codes:
+            bit_buffer = (bit_buffer << self.code_bits) | code
+            bits_in_buffer += self.code_bits
+            while bits_in_buffer >= 8:
+                bits_in_buffer -= 8
+                result.append((bit_buffer >> bits_in_buffer) & 0xFF)
+            bit_buffer &= (1 << bits_in_buffer) - 1
+
+        if bits_in_buffer > 0:
+            result.append((bit_buffer << (8 - bits_in_buffer)) & 0xFF)
+
+        return bytes(result)
+
+    def _bytes_to_codes(self, data: bytes, num_codes: int) -> List[int]:
+        """Unpack bytes back into a list of codes, code_bits bits per code."""
+        if self.code_bits == 12:
+            pair_count = num_codes // 2
+            triples = np.frombuffer(data, dtype=np.uint8,
+                                    count=pair_count * 3).reshape(-1, 3).astype(np.uint32)
+            codes = np.empty(pair_count * 2, dtype=np.uint16)
+            codes[0::2] = (triples[:, 0] << 4) | (triples[:, 1] >> 4)
+            codes[1::2] = ((triples[:, 1] & 0xF) << 8) | triples[:, 2]
+            codes = codes.tolist()
+            if num_codes & 1:
+                b0, b1 = data[pair_count * 3], data[pair_count * 3 + 1]
+                codes.append((b0 << 4) | (b1 >> 4))
+            return codes
+
+        if self.code_bits % 4 == 0:
+            # Pairwise unpack mirroring the nibble-aligned pack path
+            bits = self.code_bits
+            pair_bytes = bits // 4
+            code_mask = self.max_dict_size - 1
+            codes = []
+            offset = 0
+            for _ in range(num_codes // 2):
+                word = int.from_bytes(data[offset:offset + pair_bytes], 'big')
+                codes.append(word >> bits)
+                codes.append(word & code_mask)
+                offset += pair_bytes
+            if num_codes & 1:
+                tail_bytes = (bits + 7) // 8
+                pad = tail_bytes * 8 - bits
+                word = int.from_bytes(data[offset:offset + tail_bytes], 'big')
+                codes.append(word >> pad)
+            return codes
+
+        # Generic bit-buffer path for the remaining code widths
+        codes = []
+        bit_buffer = 0
+        bits_in_buffer = 0
+        code_mask = self.max_dict_size - 1
+
+        for byte in data:
+            bit_buffer = (bit_buffer << 8) | byte
+            bits_in_buffer += 8
+            if bits_in_buffer >= self.code_bits:
+                bits_in_buffer -= self.code_bits
+                codes.append((bit_buffer >> bits_in_buffer) & code_mask)
+                bit_buffer &= (1 << bits_in_buffer) - 1
+                if len(codes) == num_codes:
+                    break
+
+        return codes
+
+    def compress(self, data: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Compress data using LZW coding.
+
+        Args:
+            data: Input bytes to compress
+
+        Returns:
+            Tuple of (compressed_data, metadata)
+        """
+        if not data:
+            return b'', {'num_codes': 0, 'original_length': 0}
+
+        # LZ-trie dictionary: (parent_code, next_byte) -> child_code. Codes
+        # 0-255 are the bytes themselves, so no base entries are needed and
+        # each probe hashes a small tuple instead of an ever-growing bytes key
+        trie: Dict[Tuple[int, int], int] = {}
+        next_code = 256
+
+        # Codes are 12-bit, so an array('H') holds them unboxed at 2 bytes
+        # each instead of a pointer to a PyLong per entry
+        compressed_codes = array('H')
+        trie_get = trie.get
+        current_code = data[0]
+        max_dict_size = self.max_dict_size
+
+        # Learning phase: the dictionary is still growing
+        mv = memoryview(data)
+        n = len(data)
+        i = 1
+        while i < n and next_code < max_dict_size:
+            byte = mv[i]
+            key = (current_code, byte)
+            child = trie_get(key)
+            if child is not None:
+                current_code = child
+            else:
+                compressed_codes.append(current_code)
+                trie[key] = next_code
+                next_code += 1
+                current_code = byte
+            i += 1
+
+        # Steady state: the dictionary is full, so the insert branch and
+        # growth bookkeeping drop out of the per-byte loop entirely
+        for byte in mv[i:]:
+            child = trie_get((current_code, byte))
+            if child is not None:
+                current_code = child
+            else:
+                compressed_codes.append(current_code)
+                current_code = byte
+
+        compressed_codes.append(current_code)
+
+        compressed_data = self._codes_to_bytes(compressed_codes)
+
+        metadata = {
+            'num_codes': len(compressed_codes),
+            'original_length': len(data)
+        }
+
+        return compressed_data, metadata
+
+    def decompress(self, compressed_data: bytes, metadata: Dict[str, Any]) -> bytes:
+        """
+        Decompress data using LZW coding.
+
+        Args:
+            compressed_data: Compressed bytes
+            metadata: Compression metadata
+
+        Returns:
+            Original uncompressed data
+        """
+        # Older metadata carried the raw code list; current metadata only
+        # records the count and the codes are unpacked from the payload
+        compressed_codes = metadata.get('compressed_codes')
+        if compressed_codes is None:
+            compressed_codes = self._bytes_to_codes(compressed_data, metadata['num_codes'])
+        if not compressed_codes:
+            return b''
+
+        max_dict_size = self.max_dict_size
+
+        # First pass: replay the dictionary growth on entry lengths only to
+        # learn the exact output size, so the buffer never reallocates
+        code_length = [1] * 256
+        next_code = 256
+        current_length = 1
+        total_length = 1
+        for code in compressed_codes[1:]:
+            if code < next_code:
+                entry_length = code_length[code]
+            elif code == next_code:
+                entry_length = current_length + 1
+            else:
+                raise ValueError(f"Invalid LZW code: {code}")
+            total_length += entry_length
+            if next_code < max_dict_size:
+                code_length.append(current_length + 1)
+                next_code += 1
+            current_length = entry_length
+
+        # Second pass: decode into the preallocated buffer via a cursor
+        reverse_dict = self._initialize_reverse_dictionary()
+        next_code = 256
+
+        result = bytearray(total_length)
+        current_sequence = reverse_dict[compressed_codes[0]]
+        result[0:1] = current_sequence
+        pos = 1
+
+        # Learning phase: mirror the encoder's dictionary growth
+        num_codes = len(compressed_codes)
+        idx = 1
+        while idx < num_codes and next_code < max_dict_size:
+            code = compressed_codes[idx]
+            if code in reverse_dict:
+                entry = reverse_dict[code]
+            else:
+                # Pattern was defined by the immediately preceding emit
+                entry = current_sequence + self._SINGLE_BYTES[current_sequence[0]]
+
+            end = pos + len(entry)
+            result[pos:end] = entry
+            pos = end
+
+            reverse_dict[next_code] = current_sequence + self._SINGLE_BYTES[entry[0]]
+            next_code += 1
+
+            current_sequence = entry
+            idx += 1
+
+        # Steady state: every remaining code is already defined, so the
+        # insert branch and the just-defined check both disappear
+        for code in compressed_codes[idx:]:
+            entry = reverse_dict[code]
+            end = pos + len(entry)
+            result[pos:end] = entry
+            pos = end
+
+        return bytes(result)
+
+    def get_compression_ratio(self) -> float:
+        """Get compression ratio for the last compression."""
+        if not self.compression_stats:
+            return 0.0
+
+        original = self.compression_stats['original_size']
+        compressed = self.compression_stats['compressed_size']
+
+        return compressed / original if original > 0 else 0.0
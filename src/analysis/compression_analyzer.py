@@ -4,15 +4,24 @@ Compression ratio analysis and performance benchmarking.
 import time
 import os
 import json
+import hashlib
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Dict, List, Tuple, Any
 from datetime import datetime
-import pandas as pd
+import numpy as np
+try:
+    import orjson  # optional: C-level JSON for large result sets
+except Exception:
+    orjson = None
 try:
     import matplotlib.pyplot as plt
 except Exception:  # fallback for headless envs
     plt = None
 from ..algorithms.huffman import HuffmanCompressor
 from ..algorithms.arithmetic import ArithmeticCompressor
+from ..algorithms.lzw import LZWCompressor
 from .file_type_detector import FileTypeDetector
 
 
@@ -22,10 +31,14 @@ class CompressionAnalyzer:
     def __init__(self):
         self.algorithms = {
             'huffman': HuffmanCompressor(),
-            'arithmetic': ArithmeticCompressor()
+            'arithmetic': ArithmeticCompressor(),
+            'lzw': LZWCompressor()
         }
         self.file_detector = FileTypeDetector()
         self.results = []
+        # Running per-[algorithm][category] sums so reports don't rescan
+        # every stored result
+        self._agg = {}
     
     def analyze_file(self, file_path: str, algorithms: List[str] = None) -> Dict[str, Any]:
         """
@@ -44,10 +57,44 @@ class CompressionAnalyzer:
         if algorithms is None:
             algorithms = list(self.algorithms.keys())
         
-        # Detect file type
-        file_info = self.file_detector.detect_file_type(file_path)
-        
-        # Test each algorithm
+        # Detect file type; keyed on stat so repeats and reruns skip the
+        # magic-number probe while edits still invalidate the entry
+        try:
+            stat = os.stat(file_path)
+            file_info = dict(_detect_file_type_cached(file_path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            file_info = self.file_detector.detect_file_type(file_path)
+
+        # One read, then the shared in-memory pipeline
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return self._analyze_data(data, file_info, algorithms)
+
+    def analyze_bytes(self, data: bytes, name: str = 'buffer',
+                      algorithms: List[str] = None) -> Dict[str, Any]:
+        """
+        Analyze compression performance for an in-memory buffer.
+
+        Same pipeline as analyze_file without ever touching the
+        filesystem; the GUI feeds uploads through here directly.
+
+        Args:
+            data: Raw bytes to analyze
+            name: Display name used for type detection
+            algorithms: List of algorithms to test (default: all)
+
+        Returns:
+            Analysis results
+        """
+        if algorithms is None:
+            algorithms = list(self.algorithms.keys())
+
+        file_info = self.file_detector.detect_bytes(data, name)
+        return self._analyze_data(bytes(data), file_info, algorithms)
+
+    def _analyze_data(self, data: bytes, file_info: Dict[str, Any],
+                      algorithms: List[str]) -> Dict[str, Any]:
+        """Run the algorithm benchmarks over one in-memory buffer."""
         results = {
             'file_info': file_info,
             'algorithms': {},
@@ -55,21 +102,13 @@ class CompressionAnalyzer:
             'analysis_timestamp': datetime.now().isoformat()
         }
         
-        best_ratio = float('inf')
-        
         for algo_name in algorithms:
             if algo_name not in self.algorithms:
                 continue
             
             try:
-                algo_result = self._test_algorithm(file_path, algo_name)
+                algo_result = self._test_algorithm(data, algo_name)
                 results['algorithms'][algo_name] = algo_result
-                
-                # Track best algorithm
-                if algo_result['compression_ratio'] < best_ratio:
-                    best_ratio = algo_result['compression_ratio']
-                    results['best_algorithm'] = algo_name
-                    
             except Exception as e:
                 results['algorithms'][algo_name] = {
                     'error': str(e),
@@ -78,62 +117,84 @@ class CompressionAnalyzer:
                     'decompression_time': 0
                 }
         
+        # Pick the best algorithm over successful runs only, so an errored
+        # algorithm's placeholder ratio of 1.0 can never win
+        valid = {name: res for name, res in results['algorithms'].items()
+                 if 'error' not in res}
+        results['best_algorithm'] = min(valid, default=None,
+                                        key=lambda name: valid[name]['compression_ratio'])
+        
         # Store results
         self.results.append(results)
+        self._update_aggregates(results)
         return results
     
-    def _test_algorithm(self, file_path: str, algo_name: str) -> Dict[str, Any]:
-        """Test a specific algorithm on a file."""
+    def _update_aggregates(self, result: Dict[str, Any]) -> None:
+        """Fold one file's results into the running per-algorithm aggregates."""
+        category = result.get('file_info', {}).get('category', 'unknown')
+        for algo_name, algo_result in result.get('algorithms', {}).items():
+            if 'error' in algo_result:
+                continue
+            agg = self._agg.setdefault(algo_name, {}).setdefault(category, {
+                'n': 0,
+                'sum_ratio': 0.0,
+                'min_ratio': float('inf'),
+                'max_ratio': 0.0,
+                'sum_saved_percent': 0.0,
+                'sum_compression_time': 0.0,
+                'sum_decompression_time': 0.0,
+                'sum_compression_speed': 0.0,
+                'sum_decompression_speed': 0.0
+            })
+            ratio = algo_result.get('compression_ratio', 1.0)
+            agg['n'] += 1
+            agg['sum_ratio'] += ratio
+            agg['min_ratio'] = min(agg['min_ratio'], ratio)
+            agg['max_ratio'] = max(agg['max_ratio'], ratio)
+            agg['sum_saved_percent'] += algo_result.get('space_saved_percent', 0)
+            agg['sum_compression_time'] += algo_result.get('compression_time', 0)
+            agg['sum_decompression_time'] += algo_result.get('decompression_time', 0)
+            agg['sum_compression_speed'] += algo_result.get('compression_speed', 0)
+            agg['sum_decompression_speed'] += algo_result.get('decompression_speed', 0)
+    
+    def _test_algorithm(self, original_bytes: bytes, algo_name: str) -> Dict[str, Any]:
+        """Test a specific algorithm on an in-memory buffer."""
         algorithm = self.algorithms[algo_name]
-        
-        # Create temporary output file
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        compressed_path = f"temp_{base_name}_{algo_name}.compressed"
-        decompressed_path = f"temp_{base_name}_{algo_name}_decompressed"
-        
-        try:
-            # Compression test
-            start_time = time.time()
-            compression_stats = algorithm.compress_file(file_path, compressed_path)
-            compression_time = time.time() - start_time
-            
-            # Decompression test
-            start_time = time.time()
-            decompression_stats = algorithm.decompress_file(compressed_path, decompressed_path)
-            decompression_time = time.time() - start_time
-            
-            # Verify integrity by content
-            with open(file_path, 'rb') as f1, open(decompressed_path, 'rb') as f2:
-                original_bytes = f1.read()
-                decompressed_bytes = f2.read()
-            integrity_check = original_bytes == decompressed_bytes
-            
-            # Clean up temporary files
-            if os.path.exists(compressed_path):
-                os.remove(compressed_path)
-            if os.path.exists(decompressed_path):
-                os.remove(decompressed_path)
-            
-            return {
-                'compression_ratio': compression_stats['compression_ratio'],
-                'space_saved': compression_stats['space_saved'],
-                'space_saved_percent': (compression_stats['space_saved'] / compression_stats['original_size']) * 100,
-                'compression_time': compression_time,
-                'decompression_time': decompression_time,
-                'total_time': compression_time + decompression_time,
-                'compression_speed': compression_stats['original_size'] / compression_time if compression_time > 0 else 0,
-                'decompression_speed': len(decompressed_bytes) / decompression_time if decompression_time > 0 else 0,
-                'integrity_check': integrity_check,
-                'original_size': compression_stats['original_size'],
-                'compressed_size': compression_stats['compressed_size']
-            }
-            
-        except Exception as e:
-            # Clean up on error
-            for temp_file in [compressed_path, decompressed_path]:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            raise e
+        original_size = len(original_bytes)
+
+        # Compression test; perf_counter_ns is monotonic with sub-ms
+        # resolution, so small-file timings aren't floored to zero
+        start_time = time.perf_counter_ns()
+        compressed_data, metadata = algorithm.compress(original_bytes)
+        compression_time = (time.perf_counter_ns() - start_time) / 1e9
+
+        # Decompression test
+        start_time = time.perf_counter_ns()
+        decompressed_bytes = algorithm.decompress(compressed_data, metadata)
+        decompression_time = (time.perf_counter_ns() - start_time) / 1e9
+
+        # Compare BLAKE2b digests; with the in-memory pipeline both buffers
+        # are already resident, and the digests double as a stable integrity
+        # record if results are persisted
+        integrity_check = (hashlib.blake2b(decompressed_bytes).digest()
+                           == hashlib.blake2b(original_bytes).digest())
+
+        compressed_size = len(compressed_data)
+        space_saved = original_size - compressed_size
+
+        return {
+            'compression_ratio': compressed_size / original_size if original_size > 0 else 0,
+            'space_saved': space_saved,
+            'space_saved_percent': (space_saved / original_size) * 100 if original_size > 0 else 0,
+            'compression_time': compression_time,
+            'decompression_time': decompression_time,
+            'total_time': compression_time + decompression_time,
+            'compression_speed': original_size / compression_time if compression_time > 0 else 0,
+            'decompression_speed': len(decompressed_bytes) / decompression_time if decompression_time > 0 else 0,
+            'integrity_check': integrity_check,
+            'original_size': original_size,
+            'compressed_size': compressed_size
+        }
     
     def analyze_directory(self, directory_path: str, file_extensions: List[str] = None) -> Dict[str, Any]:
         """
@@ -166,15 +227,25 @@ class CompressionAnalyzer:
             'analysis_timestamp': datetime.now().isoformat()
         }
         
-        for file_path in files_to_analyze:
-            try:
-                file_result = self.analyze_file(file_path)
+        # Per-file analysis is CPU-bound and independent, so fan it out
+        # across worker processes; each worker builds its own analyzer
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = {executor.submit(_analyze_file_worker, file_path): file_path
+                       for file_path in files_to_analyze}
+            for future in as_completed(futures):
+                try:
+                    file_result = future.result()
+                except Exception as e:
+                    file_result = {
+                        'file_path': futures[future],
+                        'error': str(e)
+                    }
                 directory_results['file_results'].append(file_result)
-            except Exception as e:
-                directory_results['file_results'].append({
-                    'file_path': file_path,
-                    'error': str(e)
-                })
+                # Worker-side result lists are lost with the process, so
+                # mirror each result into this analyzer for reporting
+                if 'error' not in file_result:
+                    self.results.append(file_result)
+                    self._update_aggregates(file_result)
         
         # Calculate summary statistics
         directory_results['summary'] = self._calculate_summary(directory_results['file_results'])
@@ -203,7 +274,8 @@ class CompressionAnalyzer:
                         'compression_times': [],
                         'decompression_times': [],
                         'space_saved_percent': [],
-                        'file_sizes': []
+                        'file_sizes': [],
+                        'compressed_sizes': []
                     }
                 
                 algorithm_data[algo_name]['compression_ratios'].append(algo_result['compression_ratio'])
@@ -211,6 +283,7 @@ class CompressionAnalyzer:
                 algorithm_data[algo_name]['decompression_times'].append(algo_result['decompression_time'])
                 algorithm_data[algo_name]['space_saved_percent'].append(algo_result['space_saved_percent'])
                 algorithm_data[algo_name]['file_sizes'].append(algo_result['original_size'])
+                algorithm_data[algo_name]['compressed_sizes'].append(algo_result['compressed_size'])
         
         # Calculate statistics
         summary = {}
@@ -219,15 +292,16 @@ class CompressionAnalyzer:
                 continue
             
             summary[algo_name] = {
-                'avg_compression_ratio': sum(data['compression_ratios']) / len(data['compression_ratios']),
+                'avg_compression_ratio': statistics.fmean(data['compression_ratios']),
                 'min_compression_ratio': min(data['compression_ratios']),
                 'max_compression_ratio': max(data['compression_ratios']),
-                'avg_space_saved_percent': sum(data['space_saved_percent']) / len(data['space_saved_percent']),
-                'avg_compression_time': sum(data['compression_times']) / len(data['compression_times']),
-                'avg_decompression_time': sum(data['decompression_times']) / len(data['decompression_times']),
+                'avg_space_saved_percent': statistics.fmean(data['space_saved_percent']),
+                'avg_compression_time': statistics.fmean(data['compression_times']),
+                'avg_decompression_time': statistics.fmean(data['decompression_times']),
                 'total_files_tested': len(data['compression_ratios']),
                 'total_original_size': sum(data['file_sizes']),
-                'total_compressed_size': sum(data['compression_ratios'][i] * data['file_sizes'][i] for i in range(len(data['compression_ratios'])))
+                # The exact recorded sizes; no ratio-times-size float drift
+                'total_compressed_size': sum(data['compressed_sizes'])
             }
         
         return summary
@@ -237,31 +311,11 @@ class CompressionAnalyzer:
         if not self.results:
             return "No analysis results available."
         
-        # Create DataFrame for analysis
-        data = []
-        for result in self.results:
-            file_info = result.get('file_info', {})
-            for algo_name, algo_result in result.get('algorithms', {}).items():
-                if 'error' not in algo_result:
-                    data.append({
-                        'file_name': file_info.get('name', 'unknown'),
-                        'file_size': algo_result.get('original_size', 0),
-                        'file_category': file_info.get('category', 'unknown'),
-                        'algorithm': algo_name,
-                        'compression_ratio': algo_result.get('compression_ratio', 1.0),
-                        'space_saved_percent': algo_result.get('space_saved_percent', 0),
-                        'compression_time': algo_result.get('compression_time', 0),
-                        'decompression_time': algo_result.get('decompression_time', 0),
-                        'compression_speed': algo_result.get('compression_speed', 0),
-                        'decompression_speed': algo_result.get('decompression_speed', 0)
-                    })
-        
-        if not data:
+        if not self._agg:
             return "No valid analysis data available."
         
-        df = pd.DataFrame(data)
-        
-        # Generate report
+        # Format directly from the running aggregates; nothing here rescans
+        # the stored per-file results
         report = []
         report.append("=" * 80)
         report.append("COMPRESSION ANALYSIS REPORT")
@@ -273,36 +327,45 @@ class CompressionAnalyzer:
         # Overall statistics
         report.append("OVERALL STATISTICS")
         report.append("-" * 40)
-        for algo in df['algorithm'].unique():
-            algo_data = df[df['algorithm'] == algo]
-            report.append(f"\n{algo.upper()} ALGORITHM:")
-            report.append(f"  Average compression ratio: {algo_data['compression_ratio'].mean():.4f}")
-            report.append(f"  Best compression ratio: {algo_data['compression_ratio'].min():.4f}")
-            report.append(f"  Worst compression ratio: {algo_data['compression_ratio'].max():.4f}")
-            report.append(f"  Average space saved: {algo_data['space_saved_percent'].mean():.2f}%")
-            report.append(f"  Average compression speed: {algo_data['compression_speed'].mean():.2f} bytes/sec")
-            report.append(f"  Average decompression speed: {algo_data['decompression_speed'].mean():.2f} bytes/sec")
+        for algo_name, categories in self._agg.items():
+            n = sum(agg['n'] for agg in categories.values())
+            if n == 0:
+                continue
+            report.append(f"\n{algo_name.upper()} ALGORITHM:")
+            report.append(f"  Average compression ratio: {sum(agg['sum_ratio'] for agg in categories.values()) / n:.4f}")
+            report.append(f"  Best compression ratio: {min(agg['min_ratio'] for agg in categories.values()):.4f}")
+            report.append(f"  Worst compression ratio: {max(agg['max_ratio'] for agg in categories.values()):.4f}")
+            report.append(f"  Average space saved: {sum(agg['sum_saved_percent'] for agg in categories.values()) / n:.2f}%")
+            report.append(f"  Average compression speed: {sum(agg['sum_compression_speed'] for agg in categories.values()) / n:.2f} bytes/sec")
+            report.append(f"  Average decompression speed: {sum(agg['sum_decompression_speed'] for agg in categories.values()) / n:.2f} bytes/sec")
         
         # Category analysis
         report.append("\n\nCATEGORY ANALYSIS")
         report.append("-" * 40)
-        for category in df['file_category'].unique():
+        categories_seen = sorted({category
+                                  for categories in self._agg.values()
+                                  for category in categories})
+        for category in categories_seen:
             if category == 'unknown':
                 continue
             report.append(f"\n{category.upper()} FILES:")
-            category_data = df[df['file_category'] == category]
-            for algo in category_data['algorithm'].unique():
-                algo_data = category_data[category_data['algorithm'] == algo]
-                report.append(f"  {algo}: {algo_data['compression_ratio'].mean():.4f} avg ratio, {algo_data['space_saved_percent'].mean():.2f}% space saved")
+            for algo_name, categories in self._agg.items():
+                agg = categories.get(category)
+                if agg is None or agg['n'] == 0:
+                    continue
+                report.append(f"  {algo_name}: {agg['sum_ratio'] / agg['n']:.4f} avg ratio, {agg['sum_saved_percent'] / agg['n']:.2f}% space saved")
         
         # Best algorithm recommendations
         report.append("\n\nALGORITHM RECOMMENDATIONS")
         report.append("-" * 40)
-        best_by_category = df.groupby('file_category')['compression_ratio'].idxmin()
-        for category, idx in best_by_category.items():
-            if category != 'unknown':
-                best_algo = df.loc[idx, 'algorithm']
-                best_ratio = df.loc[idx, 'compression_ratio']
+        for category in categories_seen:
+            if category == 'unknown':
+                continue
+            candidates = [(categories[category]['min_ratio'], algo_name)
+                          for algo_name, categories in self._agg.items()
+                          if category in categories and categories[category]['n'] > 0]
+            if candidates:
+                best_ratio, best_algo = min(candidates)
                 report.append(f"{category}: {best_algo} (ratio: {best_ratio:.4f})")
         
         report_text = "\n".join(report)
@@ -316,55 +379,62 @@ class CompressionAnalyzer:
     
     def create_visualization(self, output_path: str = None) -> None:
         """Create visualization charts for compression analysis."""
-        if not self.results:
+        if not self.results or not self._agg or plt is None:
             return
         
-        # Prepare data
-        data = []
+        # Per-file ratio distributions for the boxplot and histogram; the
+        # bar charts come straight from the running aggregates
+        ratios_by_algo = {}
         for result in self.results:
-            file_info = result.get('file_info', {})
             for algo_name, algo_result in result.get('algorithms', {}).items():
                 if 'error' not in algo_result:
-                    data.append({
-                        'file_name': file_info.get('name', 'unknown'),
-                        'file_category': file_info.get('category', 'unknown'),
-                        'algorithm': algo_name,
-                        'compression_ratio': algo_result.get('compression_ratio', 1.0),
-                        'space_saved_percent': algo_result.get('space_saved_percent', 0)
-                    })
-        
-        if not data or plt is None:
+                    ratios_by_algo.setdefault(algo_name, []).append(
+                        algo_result.get('compression_ratio', 1.0))
+        
+        if not ratios_by_algo:
             return
         
-        df = pd.DataFrame(data)
+        algo_names = sorted(ratios_by_algo)
         
         # Create subplots
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
         fig.suptitle('Compression Analysis Visualization', fontsize=16)
         
         # 1. Compression ratio by algorithm
-        df.boxplot(column='compression_ratio', by='algorithm', ax=axes[0, 0])
+        axes[0, 0].boxplot([ratios_by_algo[algo] for algo in algo_names])
+        axes[0, 0].set_xticklabels(algo_names)
         axes[0, 0].set_title('Compression Ratio by Algorithm')
         axes[0, 0].set_xlabel('Algorithm')
         axes[0, 0].set_ylabel('Compression Ratio')
         
         # 2. Space saved by file category
-        category_avg = df.groupby(['file_category', 'algorithm'])['space_saved_percent'].mean().unstack()
-        category_avg.plot(kind='bar', ax=axes[0, 1])
+        categories = sorted({category
+                             for cats in self._agg.values()
+                             for category in cats})
+        positions = np.arange(len(categories))
+        width = 0.8 / max(len(algo_names), 1)
+        for i, algo_name in enumerate(algo_names):
+            cats = self._agg.get(algo_name, {})
+            heights = [cats[c]['sum_saved_percent'] / cats[c]['n'] if c in cats and cats[c]['n'] else 0
+                       for c in categories]
+            axes[0, 1].bar(positions + i * width, heights, width=width, label=algo_name)
+        axes[0, 1].set_xticks(positions + width * (len(algo_names) - 1) / 2)
+        axes[0, 1].set_xticklabels(categories, rotation=45, ha='right')
         axes[0, 1].set_title('Average Space Saved by Category and Algorithm')
         axes[0, 1].set_xlabel('File Category')
         axes[0, 1].set_ylabel('Space Saved (%)')
         axes[0, 1].legend(title='Algorithm')
         
         # 3. Compression ratio distribution
-        df['compression_ratio'].hist(bins=20, ax=axes[1, 0])
+        all_ratios = [ratio for ratios in ratios_by_algo.values() for ratio in ratios]
+        axes[1, 0].hist(all_ratios, bins=20)
         axes[1, 0].set_title('Compression Ratio Distribution')
         axes[1, 0].set_xlabel('Compression Ratio')
         axes[1, 0].set_ylabel('Frequency')
         
         # 4. Algorithm comparison
-        algo_avg = df.groupby('algorithm')['compression_ratio'].mean()
-        algo_avg.plot(kind='bar', ax=axes[1, 1])
+        avg_ratios = [statistics.fmean(ratios_by_algo[algo]) for algo in algo_names]
+        axes[1, 1].bar(algo_names, avg_ratios)
         axes[1, 1].set_title('Average Compression Ratio by Algorithm')
         axes[1, 1].set_xlabel('Algorithm')
         axes[1, 1].set_ylabel('Average Compression Ratio')
@@ -380,10 +450,30 @@ class CompressionAnalyzer:
     
     def save_results(self, output_path: str) -> None:
         """Save analysis results to JSON file."""
-        with open(output_path, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(self.results, default=str,
+                                     option=orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(self.results, f, default=str)
     
     def load_results(self, input_path: str) -> None:
         """Load analysis results from JSON file."""
-        with open(input_path, 'r') as f:
-            self.results = json.load(f)
+        with open(input_path, 'rb') as f:
+            payload = f.read()
+        self.results = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        self._agg = {}
+        for result in self.results:
+            self._update_aggregates(result)
+
+
+def _analyze_file_worker(file_path: str, algorithms: List[str] = None) -> Dict[str, Any]:
+    """Analyze one file in a fresh analyzer; top-level so it pickles cleanly."""
+    return CompressionAnalyzer().analyze_file(file_path, algorithms)
+
+
+@lru_cache(maxsize=4096)
+def _detect_file_type_cached(file_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Detect a file's type once per (path, mtime, size) triple."""
+    return FileTypeDetector().detect_file_type(file_path)
@@ -1,6 +1,7 @@
 import io
 import json
 import os
+import shutil
 import sys
 import tempfile
 import time
@@ -10,6 +11,7 @@ import streamlit as st
 try:
     from ..algorithms.huffman import HuffmanCompressor
     from ..algorithms.arithmetic import ArithmeticCompressor
+    from ..algorithms.lzw import LZWCompressor
     from ..analysis.compression_analyzer import CompressionAnalyzer
     from ..analysis.file_type_detector import FileTypeDetector
     from ..storage.cloud_simulator import CloudSimulator
@@ -20,6 +22,7 @@ except Exception:
         sys.path.insert(0, ROOT)
     from src.algorithms.huffman import HuffmanCompressor
     from src.algorithms.arithmetic import ArithmeticCompressor
+    from src.algorithms.lzw import LZWCompressor
     from src.analysis.compression_analyzer import CompressionAnalyzer
     from src.analysis.file_type_detector import FileTypeDetector
     from src.storage.cloud_simulator import CloudSimulator
@@ -28,23 +31,29 @@ except Exception:
 ALGORITHMS = {
     "Huffman": HuffmanCompressor,
     "Arithmetic": ArithmeticCompressor,
+    "LZW": LZWCompressor,
 }
 
 
+# cache_resource keeps one instance per process across reruns, so
+# compressors and the analyzer aren't rebuilt every interaction
+@st.cache_resource
+def get_compressor(name: str):
+    return ALGORITHMS[name]()
+
+
+@st.cache_resource
 def get_analyzer() -> CompressionAnalyzer:
-    if "_analyzer" not in st.session_state:
-        st.session_state._analyzer = CompressionAnalyzer()
-    return st.session_state._analyzer
+    return CompressionAnalyzer()
 
 
+@st.cache_resource
 def get_cloud() -> CloudSimulator:
-    if "_cloud" not in st.session_state:
-        st.session_state._cloud = CloudSimulator()
-    return st.session_state._cloud
+    return CloudSimulator()
 
 
 st.set_page_config(page_title="Compression Toolkit", layout="wide")
-st.title("Compression Toolkit (Huffman, Arithmetic)")
+st.title("Compression Toolkit (Huffman, Arithmetic, LZW)")
 
 tabs = st.tabs(["Compress / Decompress", "Analyze", "Cloud"],)
 
@@ -53,13 +62,14 @@ with tabs[0]:
     st.header("Compress / Decompress")
     uploaded = st.file_uploader("Upload a file", type=None)
     algo_name = st.selectbox("Algorithm", list(ALGORITHMS.keys()), index=0)
-    compressor = ALGORITHMS[algo_name]()
+    compressor = get_compressor(algo_name)
 
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Compress")
         if uploaded is not None:
-            data = uploaded.read()
+            # memoryview over the upload's BytesIO; no bytes copy
+            data = uploaded.getbuffer()
             if st.button("Run Compression", use_container_width=True):
                 start = time.time()
                 compressed, metadata = compressor.compress(data)
@@ -95,7 +105,7 @@ with tabs[0]:
         comp_file = st.file_uploader("Compressed file", key="comp_upl")
         meta_file = st.file_uploader("Metadata JSON", type=["json"], key="meta_upl")
         algo_for_decomp = st.selectbox("Algorithm for decompression", list(ALGORITHMS.keys()), index=0, key="algo_dec")
-        decomp_compressor = ALGORITHMS[algo_for_decomp]()
+        decomp_compressor = get_compressor(algo_for_decomp)
 
         if st.button("Run Decompression", use_container_width=True):
             try:
@@ -110,7 +120,7 @@ with tabs[0]:
                 else:
                     metadata = json.loads(meta_json)
                     # Fix JSON keys (convert string keys to integers)
-                    metadata = decomp_compressor._fix_json_keys(metadata)
+                    metadata = decomp_compressor._fix_metadata_keys(metadata)
                     start = time.time()
                     restored = decomp_compressor.decompress(comp_bytes, metadata)
                     dec_time = time.time() - start
@@ -146,12 +156,9 @@ with tabs[1]:
     if target_type == "Single file":
         upl = st.file_uploader("Choose a file to analyze", key="ana_file")
         if upl is not None and st.button("Analyze file", use_container_width=True):
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                tmp.write(upl.read())
-                tmp_path = tmp.name
-            res = analyzer.analyze_file(tmp_path)
+            # Analyze the upload buffer directly; no tempfile round trip
+            res = analyzer.analyze_bytes(upl.getvalue(), name=upl.name)
             st.code(json.dumps(res, indent=2, default=str))
-            os.unlink(tmp_path)
             report = analyzer.generate_report()
             st.text(report)
     else:
@@ -174,13 +181,15 @@ with tabs[2]:
     with col_upload2:
         algo_upload = None
         if compress_upload:
-            algo_upload = st.selectbox("Algorithm", ["huffman", "arithmetic"], key="cloud_algo")
+            algo_upload = st.selectbox("Algorithm", ["huffman", "arithmetic", "lzw"], key="cloud_algo")
     
     if uploaded_cloud is not None and st.button("Upload to cloud", use_container_width=True):
         with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(uploaded_cloud.read())
+            # Stream in 4MB chunks; never holds the whole upload in RAM
+            shutil.copyfileobj(uploaded_cloud, tmp, 4 * 1024 * 1024)
             tmp_path = tmp.name
-        res = cloud.upload(tmp_path, object_name=uploaded_cloud.name, compress=compress_upload, algorithm=algo_upload)
+        res = cloud.upload(tmp_path, object_name=uploaded_cloud.name, simulate_latency=False,
+                           compress=compress_upload, algorithm=algo_upload)
         os.unlink(tmp_path)
         
         # Display results nicely
@@ -198,7 +207,7 @@ with tabs[2]:
     if object_name and st.button("Download object", use_container_width=True):
         with tempfile.NamedTemporaryFile(delete=False) as tmp:
             out_path = tmp.name
-        res = cloud.download(object_name, out_path)
+        res = cloud.download(object_name, out_path, simulate_latency=False)
         with open(out_path, "rb") as fh:
             data = fh.read()
         os.unlink(out_path)
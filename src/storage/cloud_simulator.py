@@ -4,10 +4,19 @@ Simple cloud storage simulator to model upload/download bandwidth and storage co
 import os
 import time
 import json
+import hashlib
+import sqlite3
+import numpy as np
+try:
+    import orjson  # optional: C-level JSON for metadata blobs
+except Exception:
+    orjson = None
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 from ..algorithms.huffman import HuffmanCompressor
 from ..algorithms.arithmetic import ArithmeticCompressor
+from ..algorithms.lzw import LZWCompressor
+from ..algorithms import fast_codecs
 
 
 @dataclass
@@ -21,26 +30,164 @@ class PricingModel:
 ALGORITHMS = {
     'huffman': HuffmanCompressor,
     'arithmetic': ArithmeticCompressor,
+    'lzw': LZWCompressor,
     None: None
 }
 
+# Fast LZ-family codecs join the map when their libraries are installed
+if fast_codecs.HAS_LZ4:
+    ALGORITHMS['lz4'] = fast_codecs.LZ4Compressor
+if fast_codecs.HAS_ZSTD:
+    ALGORITHMS['zstd'] = fast_codecs.ZstdCompressor
+
 
 class CloudSimulator:
     """Simulates a minimal cloud object storage account."""
 
+    # Above this many bits/byte in the sampled head, the payload is
+    # effectively random and encoding it is wasted CPU
+    ENTROPY_SKIP_THRESHOLD = 7.5
+
     def __init__(self, bucket_dir: str = ".cloud_bucket", upload_mbps: float = 100.0,
-                 download_mbps: float = 200.0, pricing: PricingModel | None = None):
+                 download_mbps: float = 200.0, pricing: PricingModel | None = None,
+                 virtual_time: bool = False):
         self.bucket_dir = bucket_dir
         os.makedirs(self.bucket_dir, exist_ok=True)
         self.upload_mbps = max(upload_mbps, 1e-3)
         self.download_mbps = max(download_mbps, 1e-3)
         self.pricing = pricing or PricingModel()
+        # Per-byte rates folded down once; the hot paths then cost one
+        # multiply each instead of re-deriving unit conversions per call
+        self._up_spb = 8.0 / (self.upload_mbps * 1_000_000)
+        self._dn_spb = 8.0 / (self.download_mbps * 1_000_000)
+        self._ingress_upb = self.pricing.ingress_per_gb_usd * self._BYTES_TO_GB
+        self._egress_upb = self.pricing.egress_per_gb_usd * self._BYTES_TO_GB
+        self._storage_upb_month = self.pricing.storage_per_gb_month_usd * self._BYTES_TO_GB
+        # Virtual clock: simulate_latency charges the modelled transfer
+        # time to the reported elapsed instead of parking the thread, so
+        # harnesses can run thousands of transfers at I/O speed
+        self.virtual_time = virtual_time
+
+        # One SQLite manifest replaces the per-object JSON sidecars, so
+        # lookups and listings are queries instead of O(N) file parses;
+        # WAL keeps readers unblocked while uploads write
+        self._db = sqlite3.connect(os.path.join(self.bucket_dir, 'manifest.db'),
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS objects('
+            'name TEXT PRIMARY KEY, algorithm TEXT, '
+            'original_size INTEGER, compressed_size INTEGER, metadata BLOB)')
+        self._db.commit()
+
+        # Parsed legacy .info.json sidecars keyed on path -> (mtime_ns,
+        # dict); dashboard-style summary polling re-parses nothing
+        self._info_cache: Dict[str, tuple] = {}
+
+    _BYTES_TO_GB = 1.0 / (1024 ** 3)
 
     def _gb(self, bytes_count: int) -> float:
-        return bytes_count / (1024 ** 3)
+        return bytes_count * self._BYTES_TO_GB
 
-    def upload(self, local_path: str, object_name: str | None = None, simulate_latency: bool = True,
-               compress: bool = False, algorithm: str | None = None) -> Dict[str, Any]:
+    @staticmethod
+    def _throughput_mbps(size_bytes: int, elapsed: float) -> float:
+        """Transfer rate in Mbps; the epsilon floor keeps it branchless."""
+        return size_bytes * 8e-6 / max(elapsed, 1e-9)
+
+    @staticmethod
+    def _json_dumps(obj: Any) -> bytes:
+        """Serialize metadata to JSON bytes, through orjson when present."""
+        if orjson is not None:
+            # Frequency tables are keyed by ints; stringify them the way
+            # stdlib json does
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj).encode()
+
+    @staticmethod
+    def _json_loads(payload) -> Any:
+        """Parse JSON bytes/str, through orjson when present."""
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+    @staticmethod
+    def _copy_file(src_path: str, dst_path: str) -> None:
+        """Copy a file, pushing the loop into the kernel when possible.
+
+        os.sendfile moves the data without it ever entering userspace;
+        platforms or filesystems that refuse it fall back to a
+        reused-buffer read/write loop.
+        """
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            size = os.fstat(src.fileno()).st_size
+            try:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset >= size:
+                    return
+                src.seek(offset)
+            except (AttributeError, OSError):
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+            # readinto refills one preallocated buffer, so the fallback
+            # loop makes zero per-chunk allocations
+            buf = bytearray(8 * 1024 * 1024)
+            view = memoryview(buf)
+            while True:
+                n = src.readinto(buf)
+                if not n:
+                    break
+                dst.write(view[:n])
+
+    def _publish(self, tmp_path: str, final_path: str) -> None:
+        """Atomically publish a finished bucket file.
+
+        The data is fsynced before the rename and the directory entry
+        after it, so a crash leaves either the old object or the new one,
+        never a torn write — and the whole upload costs one directory
+        metadata flush rather than one per file.
+        """
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, final_path)
+        dir_fd = os.open(os.path.dirname(final_path) or '.', os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        """SHA-256 hex digest of a file, streamed in 1MB chunks."""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _should_compress(self, local_path: str) -> bool:
+        """Sniff the first 64KB; near-random data is not worth encoding."""
+        with open(local_path, 'rb') as f:
+            head = f.read(65536)
+        if not head:
+            return True
+        counts = np.bincount(np.frombuffer(head, dtype=np.uint8), minlength=256)
+        p = counts[counts > 0] / len(head)
+        entropy = float(-(p * np.log2(p)).sum())
+        return entropy <= self.ENTROPY_SKIP_THRESHOLD
+
+    def upload(self, local_path: str, object_name: str | None = None, simulate_latency: bool = False,
+               compress: bool = False, algorithm: str | None = None,
+               workers: int | None = None) -> Dict[str, Any]:
         if not os.path.exists(local_path):
             raise FileNotFoundError(local_path)
         object_name = object_name or os.path.basename(local_path)
@@ -48,129 +195,184 @@ class CloudSimulator:
         # Original file size
         original_size = os.path.getsize(local_path)
         
-        # Compress if requested
+        # Compress if requested, unless the head sample says the payload
+        # is already high-entropy (media, archives) and not worth a pass
         compression_stats = None
+        deduplicated = False
+        if compress and algorithm and algorithm in ALGORITHMS and not self._should_compress(local_path):
+            compress = False
+            compression_stats = {'skipped': 'high_entropy'}
         if compress and algorithm and algorithm in ALGORITHMS:
             compressor = ALGORITHMS[algorithm]()
-            with open(local_path, "rb") as f:
-                original_data = f.read()
-            compressed_data, metadata = compressor.compress(original_data)
-            
-            # Save compressed version
+
+            # Stream block by block straight into the bucket; peak memory
+            # is one block rather than the file plus its compressed form
             compressed_path = os.path.join(self.bucket_dir, object_name + '.compressed')
-            with open(compressed_path, "wb") as f:
-                f.write(compressed_data)
-            
-            # Save metadata
-            metadata_path = os.path.join(self.bucket_dir, object_name + '.metadata.json')
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f)
-            
-            # Save compression info
-            info_path = os.path.join(self.bucket_dir, object_name + '.info.json')
+            tmp_path = compressed_path + '.tmp'
+            compressed_size, metadata = compressor.compress_to_file(local_path, tmp_path,
+                                                                    workers=workers)
+            self._publish(tmp_path, compressed_path)
+
+            # One manifest row replaces the metadata and info sidecars
+            self._db.execute(
+                'INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?)',
+                (object_name, algorithm, original_size, compressed_size,
+                 self._json_dumps(metadata)))
+            self._db.commit()
+
             compression_info = {
                 'algorithm': algorithm,
                 'original_size': original_size,
-                'compressed_size': len(compressed_data),
-                'compression_ratio': len(compressed_data) / original_size if original_size > 0 else 0
+                'compressed_size': compressed_size,
+                'compression_ratio': compressed_size / original_size if original_size > 0 else 0
             }
-            with open(info_path, 'w') as f:
-                json.dump(compression_info, f)
-            
-            size_bytes = len(compressed_data)
+            size_bytes = compressed_size
             dest_path = compressed_path
             compression_stats = compression_info
         else:
-            # No compression
+            # No compression. Objects are content-addressed: the payload
+            # lives once under blobs/<digest> and each object name is a
+            # hardlink to it, so re-uploading identical bytes costs one
+            # hash pass and zero data movement
             dest_path = os.path.join(self.bucket_dir, object_name)
-            with open(local_path, "rb") as src, open(dest_path, "wb") as dst:
-                while True:
-                    chunk = src.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    dst.write(chunk)
+            digest = self._hash_file(local_path)
+            blob_path = os.path.join(self.bucket_dir, 'blobs', digest[:2], digest)
+            deduplicated = os.path.exists(blob_path)
+            if not deduplicated:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                tmp_path = blob_path + '.tmp'
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    os.link(local_path, tmp_path)
+                except OSError:
+                    self._copy_file(local_path, tmp_path)
+                self._publish(tmp_path, blob_path)
+            try:
+                if os.path.exists(dest_path):
+                    os.remove(dest_path)
+                os.link(blob_path, dest_path)
+            except OSError:
+                self._copy_file(blob_path, dest_path)
+            self._db.execute(
+                'INSERT OR REPLACE INTO objects VALUES (?, NULL, ?, ?, ?)',
+                (object_name, original_size, original_size,
+                 self._json_dumps({'digest': digest})))
+            self._db.commit()
             size_bytes = original_size
 
+        # The modelled transfer time is always reported; sleeping through
+        # it is opt-in so callers (and the GUI) aren't blocked by default
         start = time.time()
-        if simulate_latency:
-            seconds = (size_bytes * 8) / (self.upload_mbps * 1_000_000)
-            time.sleep(min(seconds, 2.0))
+        simulated_seconds = size_bytes * self._up_spb
+        if simulate_latency and not self.virtual_time:
+            time.sleep(min(simulated_seconds, 2.0))
 
         elapsed = time.time() - start
-        ingress_cost = self._gb(size_bytes) * self.pricing.ingress_per_gb_usd
-        
+        if simulate_latency and self.virtual_time:
+            elapsed += simulated_seconds
+        ingress_cost = size_bytes * self._ingress_upb
+
         result = {
             "object": object_name,
             "size_bytes": size_bytes,
             "original_size": original_size if compress else size_bytes,
             "compressed": compress,
             "seconds": elapsed,
-            "throughput_mbps": (size_bytes * 8 / 1_000_000) / elapsed if elapsed > 0 else 0.0,
+            "simulated_seconds": simulated_seconds,
+            "throughput_mbps": self._throughput_mbps(size_bytes, elapsed),
             "ingress_cost_usd": ingress_cost,
         }
         
         if compression_stats:
             result['compression_stats'] = compression_stats
-            
+        if deduplicated:
+            result['deduplicated'] = True
+
         return result
 
-    def download(self, object_name: str, local_path: str, simulate_latency: bool = True) -> Dict[str, Any]:
+    def download(self, object_name: str, local_path: str, simulate_latency: bool = False,
+                 workers: int | None = None, decompress: bool = True) -> Dict[str, Any]:
         compressed_path = os.path.join(self.bucket_dir, object_name + '.compressed')
-        info_path = os.path.join(self.bucket_dir, object_name + '.info.json')
-        
-        # Check if this is a compressed file
-        is_compressed = os.path.exists(compressed_path) and os.path.exists(info_path)
-        
+        metadata = None
+        algorithm = None
+
+        # The manifest answers "is it compressed, how, and how big" in one
+        # query; buckets written before the manifest fall back to the
+        # sidecars. size_bytes comes from the same row, sparing a stat.
+        size_bytes = None
+        row = self._db.execute(
+            'SELECT algorithm, metadata, compressed_size FROM objects WHERE name = ?',
+            (object_name,)).fetchone()
+        if row is not None and row[0] and os.path.exists(compressed_path):
+            is_compressed = True
+            algorithm = row[0]
+            metadata = self._json_loads(row[1])
+            size_bytes = row[2]
+        else:
+            info_path = os.path.join(self.bucket_dir, object_name + '.info.json')
+            is_compressed = os.path.exists(compressed_path) and os.path.exists(info_path)
+            if is_compressed:
+                with open(info_path, 'rb') as f:
+                    info = self._json_loads(f.read())
+                algorithm = info['algorithm']
+                size_bytes = info.get('compressed_size')
+
         if is_compressed:
             src_path = compressed_path
-            with open(info_path, 'r') as f:
-                compression_info = json.load(f)
-            algorithm = compression_info['algorithm']
         else:
             src_path = os.path.join(self.bucket_dir, object_name)
             if not os.path.exists(src_path):
                 raise FileNotFoundError(src_path)
-        
-        size_bytes = os.path.getsize(src_path)
+            if row is not None:
+                size_bytes = row[2]
+
+        if size_bytes is None:
+            size_bytes = os.path.getsize(src_path)
         start = time.time()
 
-        if simulate_latency:
-            seconds = (size_bytes * 8) / (self.download_mbps * 1_000_000)
-            time.sleep(min(seconds, 2.0))
+        simulated_seconds = size_bytes * self._dn_spb
+        if simulate_latency and not self.virtual_time:
+            time.sleep(min(simulated_seconds, 2.0))
 
         # Download and decompress if needed
-        if is_compressed and algorithm in ALGORITHMS:
-            # Read compressed data
-            with open(src_path, "rb") as f:
-                compressed_data = f.read()
-            
-            # Read metadata
-            metadata_path = os.path.join(self.bucket_dir, object_name + '.metadata.json')
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-            
-            # Decompress
+        if is_compressed and not decompress:
+            # Raw fetch: hand back the stored frame as-is so callers can
+            # archive or relay it without paying a decode pass
+            self._copy_file(src_path, local_path)
+            original_size = size_bytes
+        elif is_compressed and algorithm in ALGORITHMS:
+            if metadata is None:
+                # Legacy sidecar bucket layout
+                metadata_path = os.path.join(self.bucket_dir, object_name + '.metadata.json')
+                with open(metadata_path, 'rb') as f:
+                    metadata = self._json_loads(f.read())
+
             compressor = ALGORITHMS[algorithm]()
-            metadata = compressor._fix_json_keys(metadata)
-            original_data = compressor.decompress(compressed_data, metadata)
-            
-            # Write decompressed data
-            with open(local_path, "wb") as f:
-                f.write(original_data)
-            
-            original_size = len(original_data)
+            if metadata.get('blocked'):
+                # Streamed upload frame: decode block by block
+                metadata['block_metadata'] = [compressor._fix_metadata_keys(meta)
+                                              for meta in metadata['block_metadata']]
+                original_size = compressor.decompress_from_file(src_path, local_path, metadata,
+                                                                workers=workers)
+            else:
+                # Legacy single-shot object
+                with open(src_path, "rb") as f:
+                    compressed_data = f.read()
+                metadata = compressor._fix_metadata_keys(metadata)
+                original_data = compressor.decompress(compressed_data, metadata)
+                with open(local_path, "wb") as f:
+                    f.write(original_data)
+                original_size = len(original_data)
         else:
-            # No compression, copy as-is
-            with open(src_path, "rb") as src, open(local_path, "wb") as dst:
-                while True:
-                    chunk = src.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    dst.write(chunk)
+            # No compression, copy as-is in the kernel
+            self._copy_file(src_path, local_path)
             original_size = size_bytes
 
         elapsed = time.time() - start
-        egress_cost = self._gb(size_bytes) * self.pricing.egress_per_gb_usd
+        if simulate_latency and self.virtual_time:
+            elapsed += simulated_seconds
+        egress_cost = size_bytes * self._egress_upb
 
         result = {
             "object": object_name,
@@ -178,11 +380,12 @@ class CloudSimulator:
             "downloaded_size": original_size if is_compressed else size_bytes,
             "compressed": is_compressed,
             "seconds": elapsed,
-            "throughput_mbps": (size_bytes * 8 / 1_000_000) / elapsed if elapsed > 0 else 0.0,
+            "simulated_seconds": simulated_seconds,
+            "throughput_mbps": self._throughput_mbps(size_bytes, elapsed),
             "egress_cost_usd": egress_cost,
         }
         
-        if is_compressed:
+        if is_compressed and decompress:
             result['savings_bytes'] = original_size - size_bytes
             result['savings_percent'] = ((original_size - size_bytes) / original_size * 100) if original_size > 0 else 0
         
@@ -191,32 +394,65 @@ class CloudSimulator:
     def storage_summary(self) -> Dict[str, Any]:
         total_bytes = 0
         objects = []
-        for name in os.listdir(self.bucket_dir):
-            # Skip metadata and info files in summary
-            if name.endswith('.metadata.json') or name.endswith('.info.json'):
+        # One manifest query covers every object's compression info;
+        # scandir supplies the on-disk sizes without extra stat syscalls
+        manifest = {name: (algorithm, original_size)
+                    for name, algorithm, original_size in self._db.execute(
+                        'SELECT name, algorithm, original_size FROM objects')}
+        entries = []
+        sidecar_mtimes = {}
+        with os.scandir(self.bucket_dir) as it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                name = entry.name
+                if name.endswith('.metadata.json') or name.endswith('.info.json'):
+                    # Legacy sidecars: remembered for the fallback below
+                    # but never listed as objects
+                    sidecar_mtimes[name] = entry.stat().st_mtime_ns
+                    continue
+                if name.startswith('manifest.db'):
+                    continue
+                entries.append((name, entry.stat().st_size))
+
+        for name, size in entries:
+            total_bytes += size
+
+            object_name = name[:-11] if name.endswith('.compressed') else name
+            algorithm, original_size = manifest.get(object_name, (None, None))
+            if algorithm:
+                objects.append({
+                    "object": object_name,
+                    "size_bytes": size,
+                    "original_size": original_size,
+                    "compressed": True,
+                    "compression_ratio": size / original_size if original_size else 0
+                })
                 continue
-                
-            p = os.path.join(self.bucket_dir, name)
-            if os.path.isfile(p):
-                size = os.path.getsize(p)
-                total_bytes += size
-                
-                # Check if this is compressed
-                info_path = os.path.join(self.bucket_dir, name.replace('.compressed', '') + '.info.json')
-                if os.path.exists(info_path):
-                    with open(info_path, 'r') as f:
-                        info = json.load(f)
-                    objects.append({
-                        "object": name.replace('.compressed', ''),
-                        "size_bytes": size,
-                        "original_size": info.get('original_size', size),
-                        "compressed": True,
-                        "compression_ratio": info.get('compression_ratio', 0)
-                    })
+
+            # Legacy sidecar bucket layout; the dict lookup replaces a
+            # per-object exists() stat and the cache a re-parse per poll
+            info_mtime = sidecar_mtimes.get(object_name + '.info.json')
+            if name.endswith('.compressed') and info_mtime is not None:
+                info_path = os.path.join(self.bucket_dir, object_name + '.info.json')
+                cached = self._info_cache.get(info_path)
+                if cached is not None and cached[0] == info_mtime:
+                    info = cached[1]
                 else:
-                    objects.append({"object": name, "size_bytes": size, "compressed": False})
+                    with open(info_path, 'rb') as f:
+                        info = self._json_loads(f.read())
+                    self._info_cache[info_path] = (info_mtime, info)
+                objects.append({
+                    "object": object_name,
+                    "size_bytes": size,
+                    "original_size": info.get('original_size', size),
+                    "compressed": True,
+                    "compression_ratio": info.get('compression_ratio', 0)
+                })
+            else:
+                objects.append({"object": name, "size_bytes": size, "compressed": False})
         
-        monthly_cost = self._gb(total_bytes) * self.pricing.storage_per_gb_month_usd
+        monthly_cost = total_bytes * self._storage_upb_month
         return {
             "objects": objects,
             "total_bytes": total_bytes,
@@ -2,7 +2,6 @@
 Utility helpers for file I/O and safe temp handling.
 """
 import os
-import tempfile
 from typing import Tuple
 
 
@@ -11,14 +10,20 @@ def ensure_dir(path: str) -> None:
 
 
 def temp_paths(prefix: str, suffix: str = "") -> Tuple[str, str]:
-    base = next(tempfile._get_candidate_names())  # deterministic enough for demo
+    # os.urandom needs no global lock, unlike tempfile's name generator
+    base = os.urandom(6).hex()
     return (f"temp_{prefix}_{base}{suffix}", f"temp_{prefix}_{base}_out{suffix}")
 
 
 def file_sizes_equal(path_a: str, path_b: str) -> bool:
     try:
-        return os.path.getsize(path_a) == os.path.getsize(path_b)
+        stat_a, stat_b = os.stat(path_a), os.stat(path_b)
     except OSError:
         return False
+    # Same inode on the same device (hardlinks, identical paths) means
+    # equal by definition, no size comparison needed
+    if stat_a.st_ino == stat_b.st_ino and stat_a.st_dev == stat_b.st_dev:
+        return True
+    return stat_a.st_size == stat_b.st_size
 
 